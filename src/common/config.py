@@ -58,6 +58,9 @@ FOCUS_MODE_SETTINGS = {
     "violation_cooldown": 1.0,  # seconds
     "max_violations_per_minute": 10
 }
+VIOLATION_BATCH_INTERVAL = 0.1  # seconds
+VIOLATION_BATCH_MAX_SIZE = 16
+VIOLATION_DB_FLUSH_INTERVAL = 0.5  # seconds
 
 # Security Configuration
 SESSION_CODE_LENGTH = 8
@@ -74,10 +77,15 @@ DEFAULT_WINDOW_HEIGHT = 800
 # Teacher UI
 TEACHER_WINDOW_TITLE = "FocusClass Teacher"
 STUDENT_LIST_REFRESH_INTERVAL = 5  # seconds
+TEACHER_ACTIVITY_LOG_MAX_LINES = 200
+TEACHER_ACTIVITY_LOG_TRIM_INTERVAL = 5000  # milliseconds
+QR_CODE_SIZE = 150  # pixels
 
 # Student UI
 STUDENT_WINDOW_TITLE = "FocusClass Student"
 TEACHER_STREAM_RECONNECT_INTERVAL = 5  # seconds
+STUDENT_ACTIVITY_LOG_MAX_LINES = 500
+ACTIVITY_LOG_FLUSH_INTERVAL = 200  # milliseconds
 
 # Logging Configuration
 LOG_LEVEL = "INFO"
@@ -257,6 +257,23 @@ class DatabaseManager:
             self.logger.warning(f"Logged {severity} violation: {violation_type} "
                               f"for student {student_id}")
     
+    async def log_violations_batch(self, rows: List[tuple]):
+        """
+        Log several violations in one transaction
+        
+        Args:
+            rows: (session_id, student_id, violation_type, description, timestamp) tuples
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany("""
+                INSERT INTO violations 
+                (session_id, student_id, violation_type, description, timestamp)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            await db.commit()
+            
+            self.logger.debug(f"Logged {len(rows)} violations")
+    
     async def get_session_violations(self, session_id: int) -> List[Dict[str, Any]]:
         """Get all violations for a session"""
         async with aiosqlite.connect(self.db_path) as db:
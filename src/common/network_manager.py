@@ -17,6 +17,7 @@ import aiohttp
 from aiohttp import web, WSMsgType
 import ssl
 import time
+from dataclasses import dataclass
 
 # Optional imports with fallbacks
 try:
@@ -48,6 +49,13 @@ except ImportError:
     class MediaRelay:
         def subscribe(self, track): return track
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    print("Warning: orjson not available. Falling back to the standard json module.")
+
 try:
     from zeroconf import ServiceInfo, Zeroconf
     ZEROCONF_AVAILABLE = True
@@ -66,9 +74,52 @@ except ImportError:
         def close(self): pass
 
 
+def encode_json(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def _json_response(data: Any, **kwargs) -> web.Response:
+    """Build an HTTP JSON response encoded with encode_json"""
+    return web.json_response(data, dumps=lambda obj: encode_json(obj).decode("utf-8"), **kwargs)
+
+
+@dataclass
+class Violation:
+    """Focus violation reported by a student"""
+    __slots__ = ("type", "description", "timestamp")
+    type: str
+    description: str
+    timestamp: float
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "Violation":
+        """Build a violation from a message payload, filling in missing fields"""
+        return cls(
+            str(data.get("type", "unknown")),
+            str(data.get("description", "")),
+            float(data.get("timestamp") or time.time())
+        )
+
+
+# Payload parsers applied before dispatching to message handlers
+MESSAGE_PARSERS: Dict[str, Callable[[Any], Any]] = {
+    "violation": Violation.from_dict,
+    "violations_batch": lambda data: [Violation.from_dict(item) for item in data.get("items", [])]
+}
+
+
 class NetworkManager:
     """Manages network communication for FocusClass application"""
     
+    # Window for coalescing queued per-client messages into one frame
+    OUTBOUND_BATCH_INTERVAL = 0.02  # seconds
+    
+    # Send buffer for teacher websocket sockets
+    SOCKET_SEND_BUFFER = 64 * 1024
+    
     def __init__(self, is_teacher: bool = False):
         """
         Initialize network manager
@@ -98,6 +149,12 @@ class NetworkManager:
         self.message_handlers: Dict[str, Callable] = {}
         self.connection_handlers: Dict[str, Callable] = {}
         
+        # Outgoing messages waiting for the next batched flush, per client
+        self._out_queue: Dict[str, List[dict]] = {}
+        self._out_flush_handle = None
+        self._out_flush_task: Optional[asyncio.Task] = None  # Kept so the running flush is not garbage-collected
+        self._loop = None  # Loop the teacher server runs on, for queue_message_threadsafe
+        
         # Media relay for WebRTC
         if WEBRTC_AVAILABLE:
             self.media_relay = MediaRelay()
@@ -171,6 +228,7 @@ class NetworkManager:
         if not self.is_teacher:
             raise ValueError("This method is only for teacher instances")
         
+        self._loop = asyncio.get_running_loop()
         self.session_code = session_code
         self.session_password = password
         
@@ -192,9 +250,8 @@ class NetworkManager:
         await self._start_http_server()
         
         # Register service with Zeroconf for discovery
-        await self._register_service()
-        
         local_ip = self.get_local_ip()
+        await self._register_service(local_ip)
         
         server_info = {
             "session_code": session_code,
@@ -213,6 +270,10 @@ class NetworkManager:
         async def handle_websocket(websocket, path):
             client_id = str(uuid.uuid4())
             
+            # Control frames are latency sensitive; accepted sockets may not inherit the options
+            if hasattr(websocket, 'transport'):
+                self._tune_socket(websocket.transport.get_extra_info('socket'))
+            
             # Get real client IP address
             try:
                 # Extract client IP from websocket remote address
@@ -274,14 +335,29 @@ class NetworkManager:
                 if "disconnection" in self.connection_handlers:
                     await self.connection_handlers["disconnection"](client_id)
         
+        # Control messages are small JSON payloads; deflate costs more than it saves
         self.websocket_server = await websockets.serve(
             handle_websocket, 
             self.host, 
-            self.websocket_port
+            self.websocket_port,
+            compression=None
         )
+        for sock in self.websocket_server.sockets:
+            self._tune_socket(sock)
         
         self.logger.info(f"WebSocket server started on {self.host}:{self.websocket_port}")
     
+    def _tune_socket(self, sock):
+        """Disable Nagle's algorithm and enlarge the send buffer on a TCP socket"""
+        if sock is None:
+            return
+        
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.SOCKET_SEND_BUFFER)
+        except OSError as e:
+            self.logger.warning(f"Could not tune socket options: {e}")
+    
     async def _start_http_server(self):
         """Start HTTP server for REST API and file serving"""
         app = web.Application()
@@ -303,15 +379,13 @@ class NetworkManager:
         self.http_server = runner
         self.logger.info(f"HTTP server started on {self.host}:{self.http_port}")
     
-    async def _register_service(self):
+    async def _register_service(self, local_ip: str):
         """Register service with Zeroconf for LAN discovery"""
         if not ZEROCONF_AVAILABLE:
             self.logger.warning("Zeroconf not available. Network discovery disabled.")
             return
             
         try:
-            local_ip = self.get_local_ip()
-            
             # Service type for FocusClass
             service_type = "_focusclass._tcp.local."
             service_name = f"FocusClass-{self.session_code}.{service_type}"
@@ -349,14 +423,14 @@ class NetworkManager:
             password = data.get("password")
             
             if password != self.session_password:
-                return web.json_response({
+                return _json_response({
                     "success": False,
                     "error": "Invalid password"
                 }, status=401)
             
             # Validate session capacity
             if len(self.connections) >= 200:  # Max students
-                return web.json_response({
+                return _json_response({
                     "success": False,
                     "error": "Session is full"
                 }, status=429)
@@ -364,9 +438,9 @@ class NetworkManager:
             # Handle join request
             if "join_request" in self.message_handlers:
                 result = await self.message_handlers["join_request"](data)
-                return web.json_response(result)
+                return _json_response(result)
             
-            return web.json_response({
+            return _json_response({
                 "success": True,
                 "message": "Join request accepted",
                 "websocket_port": self.websocket_port
@@ -374,7 +448,7 @@ class NetworkManager:
             
         except Exception as e:
             self.logger.error(f"Error handling join request: {e}")
-            return web.json_response({
+            return _json_response({
                 "success": False,
                 "error": "Internal server error"
             }, status=500)
@@ -384,12 +458,12 @@ class NetworkManager:
         session_code = request.match_info['session_code']
         
         if session_code != self.session_code:
-            return web.json_response({
+            return _json_response({
                 "success": False,
                 "error": "Session not found"
             }, status=404)
         
-        return web.json_response({
+        return _json_response({
             "success": True,
             "session_code": self.session_code,
             "websocket_port": self.websocket_port,
@@ -404,23 +478,24 @@ class NetworkManager:
             
             if "screen_request" in self.message_handlers:
                 result = await self.message_handlers["screen_request"](data)
-                return web.json_response(result)
+                return _json_response(result)
             
-            return web.json_response({
+            return _json_response({
                 "success": True,
                 "message": "Screen request processed"
             })
             
         except Exception as e:
             self.logger.error(f"Error handling screen request: {e}")
-            return web.json_response({
+            return _json_response({
                 "success": False,
                 "error": "Internal server error"
             }, status=500)
     
     # Student Client Methods
     async def connect_to_teacher(self, teacher_ip: str, session_code: str, 
-                               password: str, student_name: str) -> bool:
+                               password: str, student_name: str,
+                               capabilities: Optional[Dict[str, Any]] = None) -> bool:
         """
         Connect student to teacher server
         
@@ -429,6 +504,7 @@ class NetworkManager:
             session_code: Session code
             password: Session password
             student_name: Student's name
+            capabilities: Optional client capabilities sent with authentication
             
         Returns:
             Connection success status
@@ -473,16 +549,20 @@ class NetworkManager:
             
             # Connect via WebSocket
             ws_url = f"ws://{teacher_ip}:{self.websocket_port}"
-            self.websocket_client = await websockets.connect(ws_url, timeout=10)
+            self.websocket_client = await websockets.connect(ws_url, timeout=10, compression=None)
             
             # Send authentication
-            await self.websocket_client.send(json.dumps({
+            auth_data = {
+                "student_name": student_name,
+                "password": password,
+                "session_code": session_code
+            }
+            if capabilities:
+                auth_data["capabilities"] = capabilities
+            
+            await self.websocket_client.send(encode_json({
                 "type": "authenticate",
-                "data": {
-                    "student_name": student_name,
-                    "password": password,
-                    "session_code": session_code
-                }
+                "data": auth_data
             }))
             
             # Start message handling
@@ -520,7 +600,9 @@ class NetworkManager:
             async for message in self.websocket_client:
                 try:
                     data = json.loads(message)
-                    await self._handle_message("teacher", data)
+                    # Batched frames carry a list of messages
+                    for item in (data if isinstance(data, list) else (data,)):
+                        await self._handle_message("teacher", item)
                 except json.JSONDecodeError:
                     self.logger.error(f"Invalid JSON from teacher: {message}")
                 except Exception as e:
@@ -638,6 +720,9 @@ class NetworkManager:
         
         if message_type in self.message_handlers:
             try:
+                parser = MESSAGE_PARSERS.get(message_type)
+                if parser:
+                    message_data = parser(message_data)
                 await self.message_handlers[message_type](client_id, message_data)
             except Exception as e:
                 self.logger.error(f"Error in message handler {message_type}: {e}")
@@ -688,6 +773,71 @@ class NetworkManager:
             "timestamp": time.time()
         }
         
+        await self.send_encoded(client_id, encode_json(message))
+    
+    def queue_message_threadsafe(self, client_id: str, message_type: str, data: dict) -> bool:
+        """Queue message to specific client from outside the server loop"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+        loop.call_soon_threadsafe(self._enqueue_message, client_id, message_type, data)
+        return True
+    
+    def _enqueue_message(self, client_id: str, message_type: str, data: dict):
+        """Add a message to the client's outbound queue and schedule a flush (runs on the loop)"""
+        self._out_queue.setdefault(client_id, []).append({
+            "type": message_type,
+            "data": data,
+            "timestamp": time.time()
+        })
+        
+        # A flush still sending re-arms the timer when it finishes, keeping frames in order
+        if self._out_flush_handle is None and self._out_flush_task is None:
+            self._schedule_out_flush()
+    
+    def _schedule_out_flush(self):
+        """Start the batched send after OUTBOUND_BATCH_INTERVAL (runs on the loop)"""
+        self._out_flush_handle = asyncio.get_running_loop().call_later(
+            self.OUTBOUND_BATCH_INTERVAL, self._start_out_flush
+        )
+    
+    def _start_out_flush(self):
+        """Start the batched send as a task that stays referenced until it finishes"""
+        self._out_flush_handle = None
+        self._out_flush_task = asyncio.get_running_loop().create_task(self._flush_out_queue())
+        self._out_flush_task.add_done_callback(self._on_out_flush_done)
+    
+    def cancel_outbound_flush(self) -> List[asyncio.Task]:
+        """Cancel the pending and running batched sends, returning tasks still to be awaited (runs on the loop)"""
+        if self._out_flush_handle:
+            self._out_flush_handle.cancel()
+            self._out_flush_handle = None
+        task = self._out_flush_task
+        if task is None or task.done():
+            return []
+        task.cancel()
+        return [task]
+    
+    def _on_out_flush_done(self, task: asyncio.Task):
+        """Drop the finished flush task, log anything it raised and send what queued meanwhile"""
+        self._out_flush_task = None
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.logger.error(f"Error sending queued messages: {task.exception()}")
+        if self._out_queue:
+            self._schedule_out_flush()
+    
+    async def _flush_out_queue(self):
+        """Send each client's queued messages as a single frame"""
+        queued, self._out_queue = self._out_queue, {}
+        
+        for client_id, messages in queued.items():
+            frame = messages[0] if len(messages) == 1 else messages
+            await self.send_encoded(client_id, encode_json(frame))
+    
+    async def send_encoded(self, client_id: str, payload: bytes):
+        """Send an already JSON-encoded message to specific client"""
         try:
             if self.is_teacher:
                 # Teacher sending to student
@@ -695,7 +845,7 @@ class NetworkManager:
                 if connection_info:
                     websocket = connection_info.get('websocket')
                     if websocket:
-                        await websocket.send(json.dumps(message))
+                        await websocket.send(payload)
                     else:
                         self.logger.warning(f"No WebSocket for {client_id}")
                 else:
@@ -703,7 +853,7 @@ class NetworkManager:
             else:
                 # Student sending to teacher
                 if self.websocket_client:
-                    await self.websocket_client.send(json.dumps(message))
+                    await self.websocket_client.send(payload)
                 else:
                     self.logger.warning("No WebSocket connection to teacher")
                     
@@ -716,11 +866,11 @@ class NetworkManager:
             raise ValueError("Broadcasting is only available for teacher instances")
         
         exclude = exclude or []
-        message = {
+        payload = encode_json({
             "type": message_type,
             "data": data,
             "timestamp": time.time()
-        }
+        })
         
         disconnected_clients = []
         
@@ -729,7 +879,7 @@ class NetworkManager:
                 try:
                     websocket = connection_info.get('websocket')
                     if websocket:
-                        await websocket.send(json.dumps(message))
+                        await websocket.send(payload)
                     else:
                         disconnected_clients.append(client_id)
                 except Exception as e:
@@ -805,6 +955,16 @@ class NetworkManager:
         self.connection_handlers[event_type] = handler
         self.logger.debug(f"Registered handler for connection event: {event_type}")
     
+    def register_message_handlers(self, handlers: Dict[str, Callable]):
+        """Register several message handlers at once"""
+        self.message_handlers.update(handlers)
+        self.logger.debug(f"Registered handlers for message types: {', '.join(handlers)}")
+    
+    def register_connection_handlers(self, handlers: Dict[str, Callable]):
+        """Register several connection event handlers at once"""
+        self.connection_handlers.update(handlers)
+        self.logger.debug(f"Registered handlers for connection events: {', '.join(handlers)}")
+    
     # Cleanup
     async def stop_server(self):
         """Stop teacher server"""
@@ -812,6 +972,10 @@ class NetworkManager:
             return
         
         try:
+            # Drop messages still waiting for a batched send
+            self.cancel_outbound_flush()
+            self._out_queue.clear()
+            
             # Close all WebSocket connections first
             disconnect_tasks = []
             for client_id, connection_info in list(self.connections.items()):
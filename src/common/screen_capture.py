@@ -7,12 +7,15 @@ import asyncio
 import logging
 import threading
 import time
-from typing import Optional, Callable, Tuple, List
+from typing import TYPE_CHECKING, Optional, Callable, Tuple, List
 import io
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageTk
+from PIL import Image, ImageDraw, ImageFont
 import tkinter as tk
 
+if TYPE_CHECKING:
+    from PIL import ImageTk
+
 # Screen capture
 import mss
 try:
@@ -258,6 +261,8 @@ class TkinterScreenCapture:
     
     def _capture_loop(self):
         """Main capture loop running in separate thread"""
+        from PIL import ImageTk  # Deferred until capture actually starts
+        
         frame_duration = 1.0 / self.fps
         
         while not self.stop_capture_event.is_set():
@@ -326,7 +331,7 @@ class TkinterScreenCapture:
         """Get current frame as PIL Image"""
         return self.current_frame
     
-    def get_current_tk_image(self) -> Optional[ImageTk.PhotoImage]:
+    def get_current_tk_image(self) -> Optional["ImageTk.PhotoImage"]:
         """Get current frame as tkinter PhotoImage"""
         return self.current_tk_image
     
@@ -562,7 +567,7 @@ class ScreenCapture:
             return self.tkinter_capture.get_current_frame()
         return None
     
-    def get_current_tk_image(self) -> Optional[ImageTk.PhotoImage]:
+    def get_current_tk_image(self) -> Optional["ImageTk.PhotoImage"]:
         """Get current frame as tkinter PhotoImage"""
         if self.tkinter_capture:
             return self.tkinter_capture.get_current_tk_image()
@@ -3,24 +3,29 @@ Utility functions for FocusClass Tkinter Application
 """
 
 import asyncio
+import ipaddress
 import logging
+import re
 import socket
 import uuid
 import secrets
 import hashlib
 import json
 import time
-import qrcode
 from io import BytesIO
-from typing import Dict, Any, Optional, List, Tuple
+from collections import deque
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple
 from pathlib import Path
 import base64
-from PIL import Image, ImageTk
+from PIL import Image
 import sys
 import os
 import tkinter as tk
 from tkinter import messagebox, filedialog
 
+if TYPE_CHECKING:
+    from PIL import ImageTk
+
 
 def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
     """
@@ -102,6 +107,25 @@ def validate_ip_address(ip: str) -> bool:
         return False
 
 
+# One RFC 1123 hostname label: letters, digits and inner hyphens, at most 63 characters
+_HOSTNAME_LABEL = re.compile(r"(?!-)[A-Za-z0-9-]{1,63}(?<!-)")
+
+
+def validate_host(host: str) -> bool:
+    """Validate a teacher address: a dotted IPv4/IPv6 address or a hostname such as teacher-pc.local"""
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        pass
+    
+    # All-numeric names are malformed addresses (e.g. "10.1"), not hostnames
+    labels = host[:-1].split(".") if host.endswith(".") else host.split(".")
+    if len(host) > 253 or labels[-1].isdigit():
+        return False
+    return all(_HOSTNAME_LABEL.fullmatch(label) for label in labels)
+
+
 def validate_port(port: int) -> bool:
     """Validate port number"""
     return 1 <= port <= 65535
@@ -147,6 +171,8 @@ def create_qr_code(data: Dict[str, Any], size: int = 200) -> Image.Image:
     Returns:
         PIL Image of QR code
     """
+    import qrcode  # Only needed once a session starts
+    
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -212,8 +238,9 @@ def base64_to_image(base64_str: str) -> Optional[Image.Image]:
         return None
 
 
-def pil_to_tkinter(image: Image.Image) -> ImageTk.PhotoImage:
+def pil_to_tkinter(image: Image.Image) -> "ImageTk.PhotoImage":
     """Convert PIL Image to Tkinter PhotoImage"""
+    from PIL import ImageTk
     return ImageTk.PhotoImage(image)
 
 
@@ -607,6 +634,23 @@ class EventEmitter:
         return asyncio.create_task(emit_to_listeners())
 
 
+class TimestampPrefix:
+    """Activity log "[HH:MM:SS] " prefix, reformatted only when the second changes"""
+    __slots__ = ("_sec", "_prefix")
+    
+    def __init__(self):
+        self._sec = -1
+        self._prefix = ""
+    
+    def __call__(self) -> str:
+        now = int(time.time())
+        if now != self._sec:
+            # Log bursts land within the same second; format the prefix once
+            self._sec = now
+            self._prefix = time.strftime("[%H:%M:%S] ", time.localtime(now))
+        return self._prefix
+
+
 class AsyncTkinterHelper:
     """Helper class to run async functions in tkinter"""
     
@@ -617,6 +661,9 @@ class AsyncTkinterHelper:
         self.thread = None
         self._cleanup_scheduled = False
         self._stop_requested = False
+        self._ui_queue = deque()  # (func, args) posted from the async loop for the Tk thread
+        self._ui_drain_pending = False
+        self._ui_closed = False  # Set once the Tk loop has stopped; nothing drains _ui_queue after that
     
     def start_async_loop(self):
         """Start async event loop in a separate thread"""
@@ -624,9 +671,7 @@ class AsyncTkinterHelper:
         
         def run_loop():
             try:
-                self.loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(self.loop)
-                self.running = True
                 self.loop.run_forever()
             except Exception as e:
                 logging.getLogger(__name__).error(f"Error in async loop: {e}")
@@ -634,6 +679,9 @@ class AsyncTkinterHelper:
                 self.running = False
         
         if not self.running and not self._stop_requested:
+            # Create the loop up front so coroutines can be submitted immediately
+            self.loop = asyncio.new_event_loop()
+            self.running = True
             self.thread = threading.Thread(target=run_loop, daemon=True)
             self.thread.start()
             
@@ -661,17 +709,52 @@ class AsyncTkinterHelper:
                 self._cleanup_scheduled = False
     
     def run_async(self, coro):
-        """Run an async coroutine"""
+        """Run an async coroutine, returning its concurrent Future (None if not scheduled)"""
         if self.loop and self.running:
             try:
-                asyncio.run_coroutine_threadsafe(coro, self.loop)
+                return asyncio.run_coroutine_threadsafe(coro, self.loop)
             except Exception as e:
                 logging.getLogger(__name__).error(f"Error running async coroutine: {e}")
+        
+        # Never scheduled; close it to avoid "coroutine was never awaited" warnings
+        coro.close()
+        return None
+    
+    def post(self, func, *args):
+        """Queue a call to run on the Tk thread, coalescing pending calls into one callback"""
+        if self._ui_closed:
+            return
+        self._ui_queue.append((func, args))
+        if not self._ui_drain_pending:
+            self._ui_drain_pending = True
+            try:
+                self.root.after_idle(self._drain_posted)
+            except (tk.TclError, RuntimeError):
+                # Window already destroyed
+                self.close_ui()
+    
+    def _drain_posted(self):
+        """Run all queued UI calls in a single Tk callback"""
+        # Clear the flag first so calls posted while draining schedule a new drain
+        self._ui_drain_pending = False
+        queue = self._ui_queue
+        while queue:
+            func, args = queue.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                logging.getLogger(__name__).error(f"Error in UI update {getattr(func, '__name__', func)}: {e}")
+    
+    def close_ui(self):
+        """Drop queued and future posted UI calls once the Tk loop has stopped"""
+        self._ui_closed = True
+        self._ui_queue.clear()
     
     def stop(self):
         """Stop the async helper"""
         self._stop_requested = True
         self._cleanup_scheduled = False
+        self.close_ui()
         
         if self.loop and self.running:
             try:
@@ -7,32 +7,82 @@ import sys
 import asyncio
 import logging
 import time
+from collections import deque
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from typing import Dict, Optional
 from pathlib import Path
-import threading
 import psutil
 
+# Optional libjpeg-turbo decoding for incoming screen share frames
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+    print("Warning: PyTurboJPEG not available. Screen share frames will be decoded with PIL.")
+
+# Optional video decoding (H.264/VP8) for teacher screen share streams
+try:
+    import av
+    PYAV_AVAILABLE = True
+except ImportError:
+    PYAV_AVAILABLE = False
+    print("Warning: PyAV not available. Screen share will use JPEG frames only.")
+
 # Import our modules
 sys.path.append(str(Path(__file__).parent.parent))
-from common.network_manager import NetworkManager
+from common.network_manager import NetworkManager, encode_json
 from common.screen_capture import StudentScreenShare
 from common.focus_manager import FocusManager, LightweightFocusManager, is_admin
 from common.utils import (
     setup_logging, parse_qr_code_data, format_duration, AsyncTkinterHelper, 
-    center_window, show_error_message, show_info_message, ask_yes_no
+    TimestampPrefix, center_window, show_error_message, show_info_message, ask_yes_no, validate_host
 )
 from common.config import *
 
+# Theme font shared by the group headings
+FONT_GROUP = (TKINTER_THEME["font_family"], 11, "bold")
+
 
 class StudentApp:
     """Main student application using tkinter"""
     
+    # Key sequences blocked while focus mode is active, with the name reported for each.
+    # Tk matches the modifiers, so platform modifier bits (NumLock, CapsLock) don't matter.
+    RESTRICTED_KEYS = (
+        ("<Control-t>", "Ctrl+t"),
+        ("<Control-n>", "Ctrl+n"),
+        ("<Control-w>", "Ctrl+w"),
+        ("<Control-Tab>", "Ctrl+Tab"),
+        ("<Alt-Tab>", "Alt+Tab"),
+        ("<Control-l>", "Ctrl+l"),
+        ("<F5>", "F5"),
+    )
+    
+    # Key events closer together than this (ms) are treated as auto-repeat
+    KEY_REPEAT_THRESHOLD = 50
+    
+    # Bits of _state; both flags live in one word so a single read sees a consistent pair
+    STATE_CONNECTED = 0x1
+    STATE_FOCUS_ACTIVE = 0x2
+    
+    # Low battery is reported below LOW_BATTERY_PERCENT and re-armed above LOW_BATTERY_RESET_PERCENT
+    LOW_BATTERY_PERCENT = 20
+    LOW_BATTERY_RESET_PERCENT = 25
+    
+    # Inter-frame video codecs decodable via PyAV, in order of preference
+    VIDEO_CODECS = ("h264", "vp8")
+    
     def __init__(self, root: tk.Tk):
         self.root = root
         self.logger = setup_logging("INFO", "logs/student.log")
         
+        # Persistent event loop for all network coroutines
+        self.async_helper = AsyncTkinterHelper(root)
+        self.async_helper.start_async_loop()
+        self._post = self.async_helper.post  # Queue a call for the Tk thread from the async loop
+        
         # Initialize components
         self.network_manager = NetworkManager(is_teacher=False)
         
@@ -44,27 +94,91 @@ class StudentApp:
             
         self.screen_share = StudentScreenShare(approval_callback=self.handle_screen_share_request)
         
+        # JPEG decoder for screen share frames (None falls back to PIL)
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+            except Exception as e:
+                self.logger.warning(f"TurboJPEG unavailable, using PIL decoder: {e}")
+        
+        # Screen share codecs advertised to the teacher; JPEG stills are always supported
+        self.supported_codecs = (list(self.VIDEO_CODECS) if PYAV_AVAILABLE else []) + ["jpeg"]
+        self._video_decoders = {}
+        
+        # PhotoImage reused across screen share frames of the same size
+        self._photo = None
+        self._photo_size = None
+        self._photo_shown = False
+        
         # State
-        self.connected = False
+        self._state = 0  # STATE_CONNECTED | STATE_FOCUS_ACTIVE bits
         self.student_name = ""
-        self.focus_mode_active = False
+        self._student_name_json = b'""'  # Pre-encoded for violation batches
         self.connection_start_time = 0
         self.violation_count = 0
+        self._last_key_time: Dict[str, int] = {}  # Last event time per restricted combination
+        self._last_focus_time = 0.0
+        self._reassert_pending = False
+        self._low_battery_reported = False
+        
+        # Violations waiting to be sent to the teacher as one batch
+        self._violation_queue = []
+        self._violation_flush_task = None
+        self._pres_visible = False
+        
+        # Last value written to each Tk variable, keyed by variable name
+        self._var_values: Dict[str, str] = {}
+        
+        # Pending activity log lines, flushed to the text widget in batches
+        self._log_buf = deque(maxlen=STUDENT_ACTIVITY_LOG_MAX_LINES)  # Lines awaiting the next flush
+        self._log_widget_lines = 0  # Lines currently in activity_text
+        self._log_flush_scheduled = False
+        self._ts_prefix = TimestampPrefix()
         
         # Setup UI and handlers
         self.setup_ui()
         self.setup_network_handlers()
-        self.setup_key_monitoring()
         self.start_monitoring()
         
         self.logger.info("Student application initialized")
     
+    @property
+    def connected(self) -> bool:
+        """Whether the student is connected to a teacher"""
+        return bool(self._state & self.STATE_CONNECTED)
+    
+    @connected.setter
+    def connected(self, value: bool):
+        if value:
+            self._state |= self.STATE_CONNECTED
+        else:
+            self._state &= ~self.STATE_CONNECTED
+    
+    @property
+    def focus_mode_active(self) -> bool:
+        """Whether the teacher has enabled focus mode"""
+        return bool(self._state & self.STATE_FOCUS_ACTIVE)
+    
+    @focus_mode_active.setter
+    def focus_mode_active(self, value: bool):
+        if value:
+            self._state |= self.STATE_FOCUS_ACTIVE
+        else:
+            self._state &= ~self.STATE_FOCUS_ACTIVE
+    
     def setup_ui(self):
         """Setup the main UI with responsive design"""
+        bg = TKINTER_THEME["bg_color"]
+        fg = TKINTER_THEME["fg_color"]
+        accent = TKINTER_THEME["accent_color"]
+        success = TKINTER_THEME["success_color"]
+        error = TKINTER_THEME["error_color"]
+        
         self.root.title("FocusClass Student")
         self.root.geometry("900x700")
         self.root.minsize(800, 600)
-        self.root.configure(bg=TKINTER_THEME["bg_color"])
+        self.root.configure(bg=bg)
         
         # Configure root for responsiveness
         self.root.grid_rowconfigure(0, weight=1)
@@ -72,90 +186,98 @@ class StudentApp:
         self.root.grid_columnconfigure(0, weight=1)
         
         # Main container with grid layout
-        main_frame = tk.Frame(self.root, bg=TKINTER_THEME["bg_color"])
+        main_frame = tk.Frame(self.root, bg=bg)
         main_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
         main_frame.grid_columnconfigure(0, weight=1)
         main_frame.grid_rowconfigure(2, weight=1)  # Activity log expands
         
         # Connection panel with improved layout
         conn_group = tk.LabelFrame(main_frame, text="Connection Settings", 
-                                  bg=TKINTER_THEME["bg_color"],
-                                  font=(TKINTER_THEME["font_family"], 11, "bold"))
+                                  bg=bg,
+                                  font=FONT_GROUP)
         conn_group.grid(row=0, column=0, sticky="ew", pady=(0, 10))
         conn_group.grid_columnconfigure((1, 3), weight=1)
         
-        form_frame = tk.Frame(conn_group, bg=TKINTER_THEME["bg_color"])
+        form_frame = tk.Frame(conn_group, bg=bg)
         form_frame.pack(padx=10, pady=10)
         
         # Form fields
-        tk.Label(form_frame, text="Name:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.name_entry = tk.Entry(form_frame, width=15)
+        tk.Label(form_frame, text="Name:", bg=bg).grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        self.name_var = tk.StringVar(value="Student")
+        self.name_entry = tk.Entry(form_frame, width=15, textvariable=self.name_var)
         self.name_entry.grid(row=0, column=1, padx=5, pady=2)
-        self.name_entry.insert(0, "Student")
         
-        tk.Label(form_frame, text="Teacher IP:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=2, sticky="w", padx=5, pady=2)
-        self.teacher_ip_entry = tk.Entry(form_frame, width=15)
+        tk.Label(form_frame, text="Teacher IP:", bg=bg).grid(row=0, column=2, sticky="w", padx=5, pady=2)
+        self.teacher_ip_var = tk.StringVar()
+        self.teacher_ip_entry = tk.Entry(form_frame, width=15, textvariable=self.teacher_ip_var)
         self.teacher_ip_entry.grid(row=0, column=3, padx=5, pady=2)
         
-        tk.Label(form_frame, text="Code:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        self.session_code_entry = tk.Entry(form_frame, width=15)
+        tk.Label(form_frame, text="Code:", bg=bg).grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        self.session_code_var = tk.StringVar()
+        self.session_code_entry = tk.Entry(form_frame, width=15, textvariable=self.session_code_var)
         self.session_code_entry.grid(row=1, column=1, padx=5, pady=2)
         
-        tk.Label(form_frame, text="Password:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=2, sticky="w", padx=5, pady=2)
-        self.password_entry = tk.Entry(form_frame, width=15, show="*")
+        tk.Label(form_frame, text="Password:", bg=bg).grid(row=1, column=2, sticky="w", padx=5, pady=2)
+        self.password_var = tk.StringVar()
+        self.password_entry = tk.Entry(form_frame, width=15, show="*", textvariable=self.password_var)
         self.password_entry.grid(row=1, column=3, padx=5, pady=2)
         
         # Buttons
-        btn_frame = tk.Frame(conn_group, bg=TKINTER_THEME["bg_color"])
+        btn_frame = tk.Frame(conn_group, bg=bg)
         btn_frame.pack(pady=5)
         
         self.connect_btn = tk.Button(btn_frame, text="🔗 Connect", command=self.connect_to_teacher,
-                                    bg=TKINTER_THEME["success_color"], fg="white")
+                                    bg=success, fg="white")
         self.connect_btn.pack(side=tk.LEFT, padx=5)
         
         self.disconnect_btn = tk.Button(btn_frame, text="❌ Disconnect", command=self.disconnect_from_teacher,
-                                       bg=TKINTER_THEME["error_color"], fg="white", state=tk.DISABLED)
+                                       bg=error, fg="white", state=tk.DISABLED)
         self.disconnect_btn.pack(side=tk.LEFT, padx=5)
         
+        # Only allow connecting once the form is valid
+        for var in (self.name_var, self.teacher_ip_var, self.session_code_var, self.password_var):
+            var.trace_add("write", self._revalidate_connection_form)
+        self._revalidate_connection_form()
+        
         # Status panel with improved layout
         status_group = tk.LabelFrame(main_frame, text="Status", 
-                                    bg=TKINTER_THEME["bg_color"],
-                                    font=(TKINTER_THEME["font_family"], 11, "bold"))
+                                    bg=bg,
+                                    font=FONT_GROUP)
         status_group.grid(row=1, column=0, sticky="ew", pady=(0, 10))
         status_group.grid_columnconfigure((1, 3), weight=1)
         
-        status_grid = tk.Frame(status_group, bg=TKINTER_THEME["bg_color"])
+        status_grid = tk.Frame(status_group, bg=bg)
         status_grid.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
         status_group.grid_columnconfigure(0, weight=1)
         
-        tk.Label(status_grid, text="Status:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        tk.Label(status_grid, text="Status:", bg=bg).grid(row=0, column=0, sticky="w", padx=5, pady=2)
         self.connection_status_var = tk.StringVar(value="Disconnected")
-        tk.Label(status_grid, textvariable=self.connection_status_var, bg=TKINTER_THEME["bg_color"], 
+        tk.Label(status_grid, textvariable=self.connection_status_var, bg=bg, 
                 font=("Arial", 10, "bold")).grid(row=0, column=1, sticky="w", padx=5)
         
-        tk.Label(status_grid, text="Connected Time:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        tk.Label(status_grid, text="Connected Time:", bg=bg).grid(row=1, column=0, sticky="w", padx=5, pady=2)
         self.connected_time_var = tk.StringVar(value="00:00:00")
-        tk.Label(status_grid, textvariable=self.connected_time_var, bg=TKINTER_THEME["bg_color"]).grid(row=1, column=1, sticky="w", padx=5)
+        tk.Label(status_grid, textvariable=self.connected_time_var, bg=bg).grid(row=1, column=1, sticky="w", padx=5)
         
-        tk.Label(status_grid, text="Focus Mode:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=2, sticky="w", padx=20, pady=2)
+        tk.Label(status_grid, text="Focus Mode:", bg=bg).grid(row=0, column=2, sticky="w", padx=20, pady=2)
         self.focus_mode_var = tk.StringVar(value="Disabled")
-        tk.Label(status_grid, textvariable=self.focus_mode_var, bg=TKINTER_THEME["bg_color"], 
+        tk.Label(status_grid, textvariable=self.focus_mode_var, bg=bg, 
                 font=("Arial", 10, "bold")).grid(row=0, column=3, sticky="w", padx=5)
         
-        tk.Label(status_grid, text="Violations:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=2, sticky="w", padx=20, pady=2)
+        tk.Label(status_grid, text="Violations:", bg=bg).grid(row=1, column=2, sticky="w", padx=20, pady=2)
         self.violation_count_var = tk.StringVar(value="0")
-        tk.Label(status_grid, textvariable=self.violation_count_var, bg=TKINTER_THEME["bg_color"], 
+        tk.Label(status_grid, textvariable=self.violation_count_var, bg=bg, 
                 font=("Arial", 10, "bold")).grid(row=1, column=3, sticky="w", padx=5)
         
         # Battery info
-        tk.Label(status_grid, text="Battery:", bg=TKINTER_THEME["bg_color"]).grid(row=2, column=0, sticky="w", padx=5, pady=2)
+        tk.Label(status_grid, text="Battery:", bg=bg).grid(row=2, column=0, sticky="w", padx=5, pady=2)
         self.battery_var = tk.StringVar(value="Unknown")
-        tk.Label(status_grid, textvariable=self.battery_var, bg=TKINTER_THEME["bg_color"]).grid(row=2, column=1, sticky="w", padx=5)
+        tk.Label(status_grid, textvariable=self.battery_var, bg=bg).grid(row=2, column=1, sticky="w", padx=5)
         
         # Activity log with improved layout
         activity_group = tk.LabelFrame(main_frame, text="Activity Log", 
-                                      bg=TKINTER_THEME["bg_color"],
-                                      font=(TKINTER_THEME["font_family"], 11, "bold"))
+                                      bg=bg,
+                                      font=FONT_GROUP)
         activity_group.grid(row=2, column=0, sticky="nsew")
         
         # Create presentation view (initially hidden)
@@ -179,7 +301,7 @@ class StudentApp:
         # Exit presentation button
         self.exit_pres_btn = tk.Button(pres_controls, text="📋 View Activity Log", 
                                       command=self.toggle_presentation_view,
-                                      bg=TKINTER_THEME["accent_color"], fg="white")
+                                      bg=accent, fg="white")
         self.exit_pres_btn.pack(side=tk.LEFT)
         
         # Presentation status
@@ -189,8 +311,9 @@ class StudentApp:
         
         self.activity_text = scrolledtext.ScrolledText(activity_group, height=15, 
                                                       bg="white", 
-                                                      fg=TKINTER_THEME["fg_color"],
-                                                      font=("Consolas", 9))
+                                                      fg=fg,
+                                                      font=("Consolas", 9),
+                                                      state=tk.DISABLED)
         self.activity_text.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
         activity_group.grid_rowconfigure(0, weight=1)
         activity_group.grid_columnconfigure(0, weight=1)
@@ -198,96 +321,158 @@ class StudentApp:
         # Status bar with grid layout
         self.status_var = tk.StringVar(value="Not connected")
         status_bar = tk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, bd=1,
-                             bg=TKINTER_THEME["bg_color"], anchor=tk.W)
+                             bg=bg, anchor=tk.W)
         status_bar.grid(row=1, column=0, sticky="ew")
         
         center_window(self.root, 900, 700)
     
+    def _set_var(self, var: tk.Variable, value: str):
+        """Set a Tk variable only if its value changed, avoiding redundant trace/redraw work"""
+        name = str(var)
+        if self._var_values.get(name) != value:
+            var.set(value)
+            self._var_values[name] = value
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the persistent network event loop"""
+        return self.async_helper.run_async(coro)
+    
+    def _show_presentation_message(self, text: str):
+        """Replace the presentation image with a text message"""
+        self.presentation_label.configure(image="", text=text)
+        self._photo_shown = False
+    
     def toggle_presentation_view(self):
         """Toggle between presentation view and activity log"""
         try:
-            if self.presentation_frame.winfo_viewable():
+            if self._pres_visible:
                 # Switch to activity log
                 self.presentation_frame.grid_remove()
                 self.activity_text.master.grid()
                 self.exit_pres_btn.configure(text="📺 View Presentation")
+                self._pres_visible = False
+                self._flush_activity_log()
             else:
                 # Switch to presentation
                 self.activity_text.master.grid_remove()
                 self.presentation_frame.grid()
                 self.exit_pres_btn.configure(text="📋 View Activity Log")
+                self._pres_visible = True
         except Exception as e:
             self.logger.error(f"Error toggling presentation view: {e}")
     
-    def handle_screen_share_data(self, frame_data):
+    def handle_screen_share_data(self, frame_data, codec: str = "jpeg"):
         """Handle incoming screen share data from teacher"""
         try:
             # Show presentation view if not already visible
-            if not self.presentation_frame.winfo_viewable():
+            if not self._pres_visible:
                 self.toggle_presentation_view()
             
             # Update presentation status
-            self.pres_status_var.set("Receiving teacher's screen")
+            self._set_var(self.pres_status_var, "Receiving teacher's screen")
             
             # If we have actual image data, display it
             if frame_data and isinstance(frame_data, bytes):
                 try:
                     from PIL import Image, ImageTk
-                    import io
                     
                     # Convert bytes to image
-                    image = Image.open(io.BytesIO(frame_data))
+                    if codec in self.VIDEO_CODECS:
+                        image = self._decode_video_frame(codec, frame_data)
+                        if image is None:
+                            return  # Decoder needs more packets before a full frame
+                    else:
+                        image = self._decode_frame(frame_data)
                     
                     # Resize to fit display
                     display_size = (800, 600)
                     image.thumbnail(display_size, Image.Resampling.LANCZOS)
                     
-                    # Convert to PhotoImage
-                    photo = ImageTk.PhotoImage(image)
+                    # Reuse the existing PhotoImage while the frame size is unchanged
+                    if self._photo is None or self._photo_size != image.size:
+                        self._photo = ImageTk.PhotoImage(image)
+                        self._photo_size = image.size
+                        self._photo_shown = False
+                    else:
+                        self._photo.paste(image)
                     
                     # Update display
-                    self.presentation_label.configure(image=photo, text="")
-                    self.presentation_label.image = photo  # Keep reference
+                    if not self._photo_shown:
+                        self.presentation_label.configure(image=self._photo, text="")
+                        self._photo_shown = True
                     
                 except Exception as img_error:
                     self.logger.error(f"Error displaying screen share: {img_error}")
-                    self.presentation_label.configure(
-                        image="", 
-                        text="Error displaying teacher's screen\n\nTechnical details available in activity log"
+                    self._show_presentation_message(
+                        "Error displaying teacher's screen\n\nTechnical details available in activity log"
                     )
             else:
                 # Show text message
-                self.presentation_label.configure(
-                    image="", 
-                    text="Teacher's presentation is active\n\nWaiting for screen data..."
+                self._show_presentation_message(
+                    "Teacher's presentation is active\n\nWaiting for screen data..."
                 )
                 
         except Exception as e:
             self.logger.error(f"Error handling screen share data: {e}")
             
+    def _decode_frame(self, frame_data: bytes):
+        """Decode a screen share frame, preferring libjpeg-turbo over PIL"""
+        from PIL import Image
+        import io
+        
+        if self._tj is not None:
+            try:
+                return Image.fromarray(self._tj.decode(frame_data, pixel_format=TJPF_RGB))
+            except Exception as e:
+                # Not a JPEG or corrupt frame; let PIL handle it
+                self.logger.debug(f"TurboJPEG decode failed, falling back to PIL: {e}")
+        
+        return Image.open(io.BytesIO(frame_data))
+    
+    def _decode_video_frame(self, codec: str, packet_data: bytes):
+        """Decode an H.264/VP8 packet, returning the latest complete frame if any"""
+        if not PYAV_AVAILABLE:
+            raise ValueError(f"Codec {codec} not supported without PyAV")
+        
+        decoder = self._video_decoders.get(codec)
+        if decoder is None:
+            decoder = av.CodecContext.create(codec, "r")
+            self._video_decoders[codec] = decoder
+        
+        image = None
+        for packet in decoder.parse(packet_data):
+            for frame in decoder.decode(packet):
+                image = frame.to_image()
+        return image
+    
     def setup_network_handlers(self):
         """Setup network message handlers"""
-        self.network_manager.register_message_handler("auth_success", self.handle_auth_success)
-        self.network_manager.register_message_handler("enable_focus_mode", self.handle_enable_focus_mode)
-        self.network_manager.register_message_handler("disable_focus_mode", self.handle_disable_focus_mode)
-        self.network_manager.register_message_handler("screen_share_data", self.handle_screen_share_message)
-        self.network_manager.register_message_handler("teacher_message", self.handle_teacher_message)
-        self.network_manager.register_connection_handler("disconnection", self.handle_disconnection)
+        self.network_manager.register_message_handlers({
+            "auth_success": self.handle_auth_success,
+            "enable_focus_mode": self.handle_enable_focus_mode,
+            "disable_focus_mode": self.handle_disable_focus_mode,
+            "screen_share_data": self.handle_screen_share_message,
+            "teacher_message": self.handle_teacher_message
+        })
+        self.network_manager.register_connection_handlers({
+            "disconnection": self.handle_disconnection
+        })
     
     async def handle_screen_share_message(self, client_id: str, data: dict):
         """Handle screen share message from teacher"""
         try:
             if data.get("enabled", False):
-                self.root.after(0, lambda: self.handle_screen_share_data(data.get("frame_data")))
-                self.root.after(0, lambda: self._add_activity_log("📺 Teacher started screen sharing"))
+                codec = data.get("codec", "jpeg")
+                self._post(self.handle_screen_share_data, data.get("frame_data"), codec)
+                self._post(self._add_activity_log, "📺 Teacher started screen sharing")
             else:
-                self.root.after(0, lambda: self.pres_status_var.set("Screen sharing stopped"))
-                self.root.after(0, lambda: self._add_activity_log("📏 Teacher stopped screen sharing"))
+                # Decoder state belongs to the stream that just ended
+                self._post(self._video_decoders.clear)
+                self._post(self._set_var, self.pres_status_var, "Screen sharing stopped")
+                self._post(self._add_activity_log, "📏 Teacher stopped screen sharing")
                 # Show default message
-                self.root.after(0, lambda: self.presentation_label.configure(
-                    image="", 
-                    text="Teacher stopped screen sharing\n\nWaiting for next presentation..."
-                ))
+                self._post(self._show_presentation_message,
+                           "Teacher stopped screen sharing\n\nWaiting for next presentation...")
         except Exception as e:
             self.logger.error(f"Error handling screen share message: {e}")
     
@@ -298,11 +483,11 @@ class StudentApp:
             timestamp = data.get("timestamp", time.time())
             
             # Show message in activity log
-            self.root.after(0, lambda: self._add_activity_log(f"💬 Teacher: {message}"))
+            self._post(self._add_activity_log, f"💬 Teacher: {message}")
             
             # Show popup if important
             if "urgent" in message.lower() or "important" in message.lower():
-                self.root.after(0, lambda: show_info_message("Message from Teacher", message))
+                self._post(show_info_message, "Message from Teacher", message)
                 
         except Exception as e:
             self.logger.error(f"Error handling teacher message: {e}")
@@ -313,7 +498,7 @@ class StudentApp:
             try:
                 if self.connected:
                     duration = time.time() - self.connection_start_time
-                    self.connected_time_var.set(format_duration(duration))
+                    self._set_var(self.connected_time_var, format_duration(duration))
                 
                 # Update battery info
                 try:
@@ -321,22 +506,19 @@ class StudentApp:
                     if battery:
                         percent = battery.percent
                         plugged = "Charging" if battery.power_plugged else "Not charging"
-                        self.battery_var.set(f"{percent}% ({plugged})")
+                        self._set_var(self.battery_var, f"{percent}% ({plugged})")
                         
-                        # Check for low battery violation
-                        if percent < 20 and not battery.power_plugged and self.connected:
-                            def run_async_task():
-                                try:
-                                    loop = asyncio.new_event_loop()
-                                    asyncio.set_event_loop(loop)
-                                    loop.run_until_complete(self._send_violation("low_battery", f"Low battery: {percent}% (not charging)"))
-                                finally:
-                                    loop.close()
-                            threading.Thread(target=run_async_task, daemon=True).start()
+                        # Report low battery once per discharge, re-arming after charging
+                        if percent < self.LOW_BATTERY_PERCENT and not battery.power_plugged:
+                            if self.connected and not self._low_battery_reported:
+                                self._low_battery_reported = True
+                                self._submit(self._send_violation("low_battery", f"Low battery: {percent}% (not charging)"))
+                        elif battery.power_plugged or percent > self.LOW_BATTERY_RESET_PERCENT:
+                            self._low_battery_reported = False
                     else:
-                        self.battery_var.set("No battery")
+                        self._set_var(self.battery_var, "No battery")
                 except:
-                    self.battery_var.set("Unknown")
+                    self._set_var(self.battery_var, "Unknown")
                     
             except Exception as e:
                 self.logger.error(f"Error in monitoring: {e}")
@@ -347,74 +529,71 @@ class StudentApp:
     
     def connect_to_teacher(self):
         """Connect to teacher"""
-        student_name = self.name_entry.get().strip()
-        teacher_ip = self.teacher_ip_entry.get().strip()
-        session_code = self.session_code_entry.get().strip()
-        password = self.password_entry.get().strip()
+        form = self._get_connection_form()
+        if form is None:
+            return  # Connect button is disabled while the form is invalid
         
-        if not all([student_name, teacher_ip, session_code, password]):
-            show_error_message("Error", "Please fill in all fields")
-            return
+        student_name, teacher_ip, session_code, password = form
         
         self.student_name = student_name
-        def run_async_task():
-            error_message = None
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._connect_async(teacher_ip, session_code, password, student_name))
-            except Exception as e:
-                error_message = str(e)
-                self.logger.error(f"Error in connection task: {e}")
-            finally:
-                loop.close()
-                if error_message:
-                    self.root.after(0, lambda msg=error_message: show_error_message("Connection Error", f"Failed to connect: {msg}"))
-        
-        threading.Thread(target=run_async_task, daemon=True).start()
+        self._submit(self._connect_async(teacher_ip, session_code, password, student_name))
+    
+    def _get_connection_form(self):
+        """Return stripped (name, teacher IP, session code, password), or None if invalid"""
+        form = (
+            self.name_var.get().strip(),
+            self.teacher_ip_var.get().strip(),
+            self.session_code_var.get().strip(),
+            self.password_var.get().strip()
+        )
+        if not all(form) or not validate_host(form[1]):
+            return None
+        return form
+    
+    def _revalidate_connection_form(self, *args):
+        """Enable the connect button only when the connection form is valid"""
+        if self.connected:
+            return
+        state = tk.NORMAL if self._get_connection_form() is not None else tk.DISABLED
+        self.connect_btn.configure(state=state)
     
     async def _connect_async(self, teacher_ip: str, session_code: str, password: str, student_name: str):
         """Async connection to teacher"""
         try:
-            success = await self.network_manager.connect_to_teacher(teacher_ip, session_code, password, student_name)
+            self._student_name_json = encode_json(student_name)
+            success = await self.network_manager.connect_to_teacher(
+                teacher_ip, session_code, password, student_name,
+                capabilities={"supported_codecs": self.supported_codecs}
+            )
             
             if success:
                 self.connected = True
                 self.connection_start_time = time.time()
-                self.root.after(0, self._update_connection_ui, True)
-                self.root.after(0, lambda: self._add_activity_log(f"✅ Connected to teacher at {teacher_ip}"))
+                self._post(self._update_connection_ui, True)
+                self._post(self._add_activity_log, f"✅ Connected to teacher at {teacher_ip}")
             else:
-                self.root.after(0, lambda: show_error_message("Error", "Failed to connect to teacher"))
+                self._post(show_error_message, "Error", "Failed to connect to teacher")
                 
         except Exception as e:
-            self.root.after(0, lambda: show_error_message("Error", f"Connection error: {e}"))
+            self._post(show_error_message, "Error", f"Connection error: {e}")
     
     def disconnect_from_teacher(self):
         """Disconnect from teacher"""
         if ask_yes_no("Confirm", "Disconnect from the session?"):
-            def run_async_task():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self._disconnect_async())
-                except Exception as e:
-                    self.logger.error(f"Error in disconnection task: {e}")
-                finally:
-                    loop.close()
-            
-            threading.Thread(target=run_async_task, daemon=True).start()
+            self._submit(self._disconnect_async())
     
     async def _disconnect_async(self):
         """Async disconnection"""
         try:
+            self._drop_pending_violations()
             await self.network_manager.disconnect_client()
             if self.focus_mode_active:
                 await self.focus_manager.disable_focus_mode()
                 self.focus_mode_active = False
             
             self.connected = False
-            self.root.after(0, self._update_connection_ui, False)
-            self.root.after(0, lambda: self._add_activity_log("❌ Disconnected from teacher"))
+            self._post(self._update_connection_ui, False)
+            self._post(self._add_activity_log, "❌ Disconnected from teacher")
             
         except Exception as e:
             self.logger.error(f"Disconnection error: {e}")
@@ -422,7 +601,7 @@ class StudentApp:
     def _update_connection_ui(self, connected: bool):
         """Update UI based on connection status"""
         if connected:
-            self.connection_status_var.set("Connected")
+            self._set_var(self.connection_status_var, "Connected")
             self.connect_btn.configure(state=tk.DISABLED)
             self.disconnect_btn.configure(state=tk.NORMAL)
             self.status_var.set("Connected to teacher")
@@ -430,18 +609,18 @@ class StudentApp:
             for widget in [self.name_entry, self.teacher_ip_entry, self.session_code_entry, self.password_entry]:
                 widget.configure(state=tk.DISABLED)
         else:
-            self.connection_status_var.set("Disconnected")
-            self.connect_btn.configure(state=tk.NORMAL)
+            self._set_var(self.connection_status_var, "Disconnected")
+            self._revalidate_connection_form()
             self.disconnect_btn.configure(state=tk.DISABLED)
             self.status_var.set("Not connected")
-            self.focus_mode_var.set("Disabled")
+            self._set_var(self.focus_mode_var, "Disabled")
             
             for widget in [self.name_entry, self.teacher_ip_entry, self.session_code_entry, self.password_entry]:
                 widget.configure(state=tk.NORMAL)
     
     async def handle_auth_success(self, client_id: str, data: dict):
         """Handle successful authentication"""
-        self.root.after(0, lambda: self._add_activity_log("✅ Authentication successful"))
+        self._post(self._add_activity_log, "✅ Authentication successful")
     
     async def handle_enable_focus_mode(self, client_id: str, data: dict):
         """Handle focus mode enable request"""
@@ -451,14 +630,14 @@ class StudentApp:
             
             if success:
                 self.focus_mode_active = True
-                self.root.after(0, lambda: self.focus_mode_var.set("Enabled"))
-                self.root.after(0, lambda: self._add_activity_log("🔒 Focus mode enabled"))
+                self._post(self._set_var, self.focus_mode_var, "Enabled")
+                self._post(self._add_activity_log, "🔒 Focus mode enabled")
                 
                 # Force fullscreen mode
-                self.root.after(0, self._enter_fullscreen_mode)
+                self._post(self._enter_fullscreen_mode)
                 
                 # Show warning message
-                self.root.after(1000, lambda: show_info_message(
+                self._post(self.root.after, 1000, show_info_message,
                     "Focus Mode Enabled", 
                     "Focus mode is now active!\n\n"
                     "Restrictions in effect:\n"
@@ -467,9 +646,9 @@ class StudentApp:
                     "• Window switching restricted\n"
                     "• Certain key combinations disabled\n\n"
                     "Any violation attempts will be reported to the teacher."
-                ))
+                )
             else:
-                self.root.after(0, lambda: self._add_activity_log("❌ Failed to enable focus mode"))
+                self._post(self._add_activity_log, "❌ Failed to enable focus mode")
                 
         except Exception as e:
             self.logger.error(f"Error enabling focus mode: {e}")
@@ -490,6 +669,9 @@ class StudentApp:
             self.root.bind('<Alt-F4>', self._prevent_exit_fullscreen)
             self.root.bind('<Control-w>', self._prevent_exit_fullscreen)
             
+            # Block restricted key combinations while in focus mode
+            self.setup_key_monitoring()
+            
             # Focus on the window
             self.root.focus_force()
             self.root.grab_set()
@@ -508,7 +690,8 @@ class StudentApp:
     def _monitor_window_focus(self):
         """Monitor window focus to detect tab/window switches"""
         try:
-            if self.focus_mode_active:
+            state = self._state
+            if state & self.STATE_FOCUS_ACTIVE:
                 # Check if our window still has focus
                 current_focus = self.root.focus_get()
                 
@@ -517,31 +700,24 @@ class StudentApp:
                     current_time = time.time()
                     
                     # Throttle violation reports (only if more than 2 seconds since last)
-                    if hasattr(self, '_last_focus_time') and current_time - self._last_focus_time > 2.0:
+                    if current_time - self._last_focus_time > 2.0:
                         self._last_focus_time = current_time
                         
                         # Send violation to teacher
-                        def run_async_task():
-                            try:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                loop.run_until_complete(self._send_violation(
-                                    "focus_loss_detected", 
-                                    "Student may have switched tabs or windows"
-                                ))
-                            finally:
-                                loop.close()
-                        
-                        threading.Thread(target=run_async_task, daemon=True).start()
+                        if state & self.STATE_CONNECTED:
+                            self._submit(self._send_violation(
+                                "focus_loss_detected", 
+                                "Student may have switched tabs or windows"
+                            ))
                         self._add_activity_log("⚠️ Focus lost - possible tab/window switch detected")
-                
-                # Force window back to focus
-                try:
-                    self.root.focus_force()
-                    self.root.lift()
-                    self.root.attributes('-topmost', True)
-                except:
-                    pass
+                    
+                    # Force window back to focus
+                    try:
+                        self.root.focus_force()
+                        self.root.lift()
+                        self.root.attributes('-topmost', True)
+                    except:
+                        pass
                 
                 # Schedule next check
                 self.root.after(1000, self._monitor_window_focus)
@@ -553,22 +729,16 @@ class StudentApp:
         """Prevent student from exiting fullscreen"""
         try:
             # Send violation to teacher
-            def run_async_task():
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self._send_violation(
-                        "fullscreen_exit_attempt", 
-                        f"Student attempted to exit fullscreen using {event.keysym}"
-                    ))
-                finally:
-                    loop.close()
-            
-            threading.Thread(target=run_async_task, daemon=True).start()
+            if self.connected:
+                self._submit(self._send_violation(
+                    "fullscreen_exit_attempt", 
+                    f"Student attempted to exit fullscreen using {event.keysym}"
+                ))
             
-            # Force back to fullscreen
-            self.root.after(10, lambda: self.root.attributes('-fullscreen', True))
-            self.root.after(10, lambda: self.root.attributes('-topmost', True))
+            # Force back to fullscreen; repeated keys share one pending reassertion
+            if not self._reassert_pending:
+                self._reassert_pending = True
+                self.root.after_idle(self._reassert_fullscreen)
             
             self._add_activity_log(f"⚠️ Attempted to exit fullscreen using {event.keysym}")
             
@@ -578,16 +748,27 @@ class StudentApp:
         except Exception as e:
             self.logger.error(f"Error preventing fullscreen exit: {e}")
     
+    def _reassert_fullscreen(self):
+        """Restore fullscreen and topmost state if either has drifted"""
+        self._reassert_pending = False
+        try:
+            if not int(self.root.attributes('-fullscreen')):
+                self.root.attributes('-fullscreen', True)
+            if not int(self.root.attributes('-topmost')):
+                self.root.attributes('-topmost', True)
+        except tk.TclError as e:
+            self.logger.error(f"Error restoring fullscreen: {e}")
+    
     async def handle_disable_focus_mode(self, client_id: str, data: dict):
         """Handle focus mode disable request"""
         try:
             await self.focus_manager.disable_focus_mode()
             self.focus_mode_active = False
-            self.root.after(0, lambda: self.focus_mode_var.set("Disabled"))
-            self.root.after(0, lambda: self._add_activity_log("🔓 Focus mode disabled"))
+            self._post(self._set_var, self.focus_mode_var, "Disabled")
+            self._post(self._add_activity_log, "🔓 Focus mode disabled")
             
             # Exit fullscreen mode
-            self.root.after(0, self._exit_fullscreen_mode)
+            self._post(self._exit_fullscreen_mode)
             
         except Exception as e:
             self.logger.error(f"Error disabling focus mode: {e}")
@@ -605,6 +786,7 @@ class StudentApp:
             # Remove key bindings
             self.root.unbind('<Escape>')
             self.root.unbind('<F11>')
+            self.remove_key_monitoring()
             
             # Release grab
             self.root.grab_release()
@@ -620,37 +802,43 @@ class StudentApp:
     def setup_key_monitoring(self):
         """Setup key monitoring for additional restrictions"""
         try:
-            # Bind global key events when focus mode is active
-            self.root.bind_all('<Control-t>', self._handle_restricted_key)
-            self.root.bind_all('<Control-n>', self._handle_restricted_key)
-            self.root.bind_all('<Control-w>', self._handle_restricted_key)
-            self.root.bind_all('<Control-Tab>', self._handle_restricted_key)
-            self.root.bind_all('<Alt-Tab>', self._handle_restricted_key)
-            self.root.bind_all('<Control-l>', self._handle_restricted_key)
-            self.root.bind_all('<F5>', self._handle_restricted_key)
+            # Only installed while focus mode is active
+            for sequence, combination in self.RESTRICTED_KEYS:
+                self.root.bind_all(sequence, lambda e, c=combination: self._key_dispatch(e, c))
             
         except Exception as e:
             self.logger.error(f"Error setting up key monitoring: {e}")
     
-    def _handle_restricted_key(self, event):
+    def remove_key_monitoring(self):
+        """Remove key monitoring installed by setup_key_monitoring"""
+        try:
+            for sequence, _ in self.RESTRICTED_KEYS:
+                self.root.unbind_all(sequence)
+        except Exception as e:
+            self.logger.error(f"Error removing key monitoring: {e}")
+    
+    def _key_dispatch(self, event, key_combination: str):
+        """Block a restricted key combination, reporting it once per press"""
+        # Auto-repeat of a held key is blocked but not reported again
+        last_time = self._last_key_time.get(key_combination)
+        is_repeat = last_time is not None and event.time - last_time < self.KEY_REPEAT_THRESHOLD
+        self._last_key_time[key_combination] = event.time
+        if is_repeat:
+            return "break"
+        
+        return self._handle_restricted_key(key_combination)
+    
+    def _handle_restricted_key(self, key_combination: str):
         """Handle restricted key combinations"""
         try:
-            if self.focus_mode_active:
+            state = self._state
+            if state & self.STATE_FOCUS_ACTIVE:
                 # Send violation to teacher
-                key_combination = self._get_key_combination(event)
-                
-                def run_async_task():
-                    try:
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        loop.run_until_complete(self._send_violation(
-                            "restricted_key_attempt", 
-                            f"Student attempted restricted key combination: {key_combination}"
-                        ))
-                    finally:
-                        loop.close()
-                
-                threading.Thread(target=run_async_task, daemon=True).start()
+                if state & self.STATE_CONNECTED:
+                    self._submit(self._send_violation(
+                        "restricted_key_attempt", 
+                        f"Student attempted restricted key combination: {key_combination}"
+                    ))
                 
                 self._add_activity_log(f"⚠️ Blocked restricted key: {key_combination}")
                 
@@ -659,24 +847,6 @@ class StudentApp:
         except Exception as e:
             self.logger.error(f"Error handling restricted key: {e}")
     
-    def _get_key_combination(self, event):
-        """Get readable key combination string"""
-        try:
-            modifiers = []
-            if event.state & 0x4:  # Control
-                modifiers.append("Ctrl")
-            if event.state & 0x8:  # Alt
-                modifiers.append("Alt")
-            if event.state & 0x1:  # Shift
-                modifiers.append("Shift")
-            
-            key = event.keysym
-            if modifiers:
-                return "+".join(modifiers) + "+" + key
-            return key
-        except:
-            return str(event.keysym)
-    
     async def handle_focus_violation(self, violation_data: dict):
         """Handle focus mode violation"""
         try:
@@ -686,8 +856,8 @@ class StudentApp:
             await self._send_violation(violation_type, description)
             
             self.violation_count += 1
-            self.root.after(0, lambda: self.violation_count_var.set(str(self.violation_count)))
-            self.root.after(0, lambda: self._add_activity_log(f"⚠️ Violation: {violation_type}"))
+            self._post(self._set_var, self.violation_count_var, str(self.violation_count))
+            self._post(self._add_activity_log, f"⚠️ Violation: {violation_type}")
             
         except Exception as e:
             self.logger.error(f"Error handling violation: {e}")
@@ -700,48 +870,109 @@ class StudentApp:
             if approved:
                 success = await self.screen_share.handle_share_request(request_data)
                 if success.get("success"):
-                    self.root.after(0, lambda: self._add_activity_log("📺 Screen sharing started"))
+                    self._post(self._add_activity_log, "📺 Screen sharing started")
                 else:
-                    self.root.after(0, lambda: self._add_activity_log("❌ Failed to start screen sharing"))
+                    self._post(self._add_activity_log, "❌ Failed to start screen sharing")
             else:
-                self.root.after(0, lambda: self._add_activity_log("❌ Screen sharing request denied"))
+                self._post(self._add_activity_log, "❌ Screen sharing request denied")
                 
         except Exception as e:
             self.logger.error(f"Error handling screen share request: {e}")
     
     async def _send_violation(self, violation_type: str, description: str):
-        """Send violation to teacher"""
+        """Queue violation for the teacher, sending queued violations in batches"""
         try:
             if self.connected:
-                await self.network_manager._send_message("teacher", "violation", {
+                self._violation_queue.append({
                     "type": violation_type,
                     "description": description,
-                    "timestamp": time.time(),
-                    "student_name": self.student_name
+                    "timestamp": time.time()
                 })
+                
+                if len(self._violation_queue) >= VIOLATION_BATCH_MAX_SIZE:
+                    await self._flush_violations()
+                elif self._violation_flush_task is None:
+                    self._violation_flush_task = asyncio.ensure_future(self._flush_violations_later())
         except Exception as e:
             self.logger.error(f"Error sending violation: {e}")
     
+    async def _flush_violations_later(self):
+        """Send queued violations once the batching window has elapsed"""
+        await asyncio.sleep(VIOLATION_BATCH_INTERVAL)
+        self._violation_flush_task = None
+        await self._flush_violations()
+    
+    def _drop_pending_violations(self):
+        """Discard violations queued for a connection that has ended (runs on the async loop)"""
+        if self._violation_flush_task is not None:
+            self._violation_flush_task.cancel()
+            self._violation_flush_task = None
+        self._violation_queue = []
+    
+    async def _flush_violations(self):
+        """Send all queued violations to the teacher in a single message"""
+        items, self._violation_queue = self._violation_queue, []
+        if not items:
+            return
+        
+        try:
+            # Splice the pre-encoded student name into the envelope instead of re-encoding it
+            payload = b"".join((
+                b'{"type":"violations_batch","data":{"student_name":', self._student_name_json,
+                b',"items":', encode_json(items),
+                b'},"timestamp":', encode_json(time.time()), b'}'
+            ))
+            await self.network_manager.send_encoded("teacher", payload)
+        except Exception as e:
+            self.logger.error(f"Error sending violations: {e}")
+    
     async def handle_disconnection(self, client_id: str):
         """Handle disconnection from teacher"""
         self.connected = False
+        self._drop_pending_violations()
         if self.focus_mode_active:
             await self.focus_manager.disable_focus_mode()
             self.focus_mode_active = False
         
-        self.root.after(0, self._update_connection_ui, False)
-        self.root.after(0, lambda: self._add_activity_log("❌ Connection lost to teacher"))
+        self._post(self._update_connection_ui, False)
+        self._post(self._add_activity_log, "❌ Connection lost to teacher")
     
     def _add_activity_log(self, message: str):
         """Add activity log message"""
-        timestamp = time.strftime("%H:%M:%S")
-        self.activity_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.activity_text.see(tk.END)
+        self._log_buf.append("%s%s\n" % (self._ts_prefix(), message))
+        
+        # Activity pane is hidden behind the presentation; replay when it is shown
+        if self._pres_visible:
+            return
         
-        # Keep only last 100 lines
-        lines = self.activity_text.get(1.0, tk.END).splitlines()
-        if len(lines) > 100:
-            self.activity_text.delete(1.0, f"{len(lines) - 100}.0")
+        # Coalesce bursts of messages into a single widget update
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.root.after(ACTIVITY_LOG_FLUSH_INTERVAL, self._flush_activity_log)
+    
+    def _flush_activity_log(self):
+        """Write buffered activity log messages to the text widget"""
+        self._log_flush_scheduled = False
+        if not self._log_buf or self._pres_visible:
+            return
+        
+        try:
+            text = "".join(self._log_buf)
+            self._log_buf.clear()
+            self._log_widget_lines += text.count("\n")
+            
+            self.activity_text.config(state=tk.NORMAL)
+            self.activity_text.insert(tk.END, text)
+            self.activity_text.see(tk.END)
+            
+            # Keep only the last STUDENT_ACTIVITY_LOG_MAX_LINES lines
+            excess = self._log_widget_lines - STUDENT_ACTIVITY_LOG_MAX_LINES
+            if excess > 0:
+                self.activity_text.delete("1.0", f"{excess + 1}.0")
+                self._log_widget_lines = STUDENT_ACTIVITY_LOG_MAX_LINES
+            self.activity_text.config(state=tk.DISABLED)
+        except tk.TclError as e:
+            self.logger.error(f"Error flushing activity log: {e}")
     
     def run(self):
         """Run the application"""
@@ -750,15 +981,18 @@ class StudentApp:
         except Exception as e:
             self.logger.error(f"Error in student app main loop: {e}")
         finally:
-            # Clean shutdown
+            # Clean shutdown; the Tk loop is gone, so cleanup must not queue UI work
+            self.async_helper.close_ui()
             try:
                 if self.connected:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self._disconnect_async())
-                    loop.close()
+                    # Disconnect on the persistent loop rather than spinning up a new one
+                    future = self._submit(self._disconnect_async())
+                    if future:
+                        future.result(timeout=5)
             except Exception as cleanup_error:
                 self.logger.error(f"Error during cleanup: {cleanup_error}")
+            finally:
+                self.async_helper.stop()
 
 
 def main():
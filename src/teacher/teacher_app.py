@@ -7,35 +7,119 @@ import asyncio
 import logging
 import json
 import time
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext, simpledialog
+from tkinter import ttk, messagebox, scrolledtext
 from typing import Dict, List, Optional, Any
 from pathlib import Path
-import threading
-from PIL import Image, ImageTk
+from functools import lru_cache
+from operator import itemgetter
+from itertools import groupby, repeat
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque, OrderedDict
+from PIL import Image
 
 # Import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 from common.database_manager import DatabaseManager
-from common.network_manager import NetworkManager, generate_session_code, generate_session_password
+from common.network_manager import NetworkManager, Violation, generate_session_code, generate_session_password
 from common.screen_capture import ScreenCapture
 from common.utils import (
-    setup_logging, create_qr_code, get_local_ip, format_duration, 
-    AsyncTkinterHelper, center_window, show_info_message, show_error_message, ask_yes_no
+    setup_logging, create_qr_code, get_local_ip, 
+    AsyncTkinterHelper, TimestampPrefix, center_window, show_info_message, show_error_message, ask_yes_no
 )
 from common.config import *
 
+# Theme fonts shared by the panel builders
+FONT_TITLE = (TKINTER_THEME["font_family"], 20, "bold")
+FONT_SUBTITLE = (TKINTER_THEME["font_family"], 12)
+FONT_H2 = (TKINTER_THEME["font_family"], 12, "bold")
+FONT_H3 = (TKINTER_THEME["font_family"], 10, "bold")
+
+
+@lru_cache(maxsize=4)
+def _render_qr(teacher_ip: str, session_code: str, password: str) -> Image.Image:
+    """Render the session QR code image; safe to call off the Tk thread"""
+    return create_qr_code({
+        "type": "focusclass_session", 
+        "teacher_ip": teacher_ip, 
+        "session_code": session_code, 
+        "password": password
+    }, size=QR_CODE_SIZE)
+
+
+def _tag_runs(lines) -> list:
+    """Flatten (text, tag) lines into Text.insert arguments, joining consecutive lines that share a tag"""
+    args = []
+    for tag, run in groupby(lines, key=itemgetter(1)):
+        args.append("".join([text for text, _ in run]))
+        args.append(tag)
+    return args
+
+
+class _ThrottleWindow:
+    """Start time and accepted count of one violation throttle window"""
+    __slots__ = ("start", "count")
+    
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 1
+
 
 class TeacherApp:
     """Main teacher application using tkinter"""
     
+    # Longest cleanup waits for cancelled background tasks to finish
+    TASK_CANCEL_TIMEOUT = 2.0  # seconds
+    
+    # Clock tick interval while no session is running
+    IDLE_TICK_INTERVAL = 5000  # milliseconds
+    
+    # Delay used to coalesce roster and counter refreshes during bursts
+    UI_REFRESH_DELAY = 50  # milliseconds
+    
+    # Violations accepted per throttle window, and the log suffix for each count
+    VIOLATION_THROTTLE_LIMIT = 3
+    VIOLATION_REPEAT_SUFFIX = ("", "", " (x2)", " (x3)")
+    
+    # Status column value; the roster only holds connected students
+    STATUS_CONNECTED = "Connected"
+    
+    # Activity log prefix for each log type
+    ACTIVITY_LOG_EMOJI = {
+        "info": "ℹ️",
+        "success": "✅",
+        "warning": "⚠️",
+        "error": "❌",
+        "violation": "😱"
+    }
+    
+    # Keys the read-only activity log passes to the Text bindings: navigation, plus any
+    # shortcut with the platform modifier except the ones Text binds to edits
+    LOG_NAV_KEYS = frozenset({"Up", "Down", "Left", "Right", "Prior", "Next", "Home", "End"})
+    LOG_EDIT_SHORTCUT_KEYS = frozenset({
+        "d", "D", "h", "H", "i", "I", "k", "K", "o", "O", "t", "T",
+        "BackSpace", "Delete", "Return", "KP_Enter"
+    })
+    
+    # Activity log tags shown for each filter choice (None shows everything)
+    ACTIVITY_FILTER_TAGS = {
+        "All": None,
+        "Connections": frozenset({"success", "warning"}),
+        "Violations": frozenset({"violation"}),
+        "Errors": frozenset({"error"}),
+        "Info": frozenset({"info"})
+    }
+    
     def __init__(self, root: tk.Tk):
         self.root = root
         self.logger = setup_logging("INFO", "logs/teacher.log")
         
-        # Initialize async helper first
+        # Initialize async helper first; network and database work share its loop
         self.async_helper = AsyncTkinterHelper(root)
-        self.async_tasks = set()  # Track async tasks for cleanup
+        self.async_helper.start_async_loop()
+        self._post = self.async_helper.post  # Queue a call for the Tk thread from the async loop
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="teacher-io")  # Blocking disk work
         
         # Initialize components
         self.db_manager = DatabaseManager()
@@ -47,13 +131,17 @@ class TeacherApp:
         self.session_active = False
         self.screen_sharing_active = False
         self.focus_mode_active = False
-        self.session_start_time = 0
+        self.session_start_monotonic = 0.0
         
         # UI Variables - initialize early
         self.session_code_var = tk.StringVar(value="Not Started")
         self.session_password_var = tk.StringVar(value="")
         self.password_display_var = tk.StringVar(value="")
-        self.teacher_ip_var = tk.StringVar(value=get_local_ip())
+        self._local_ip = get_local_ip()  # Resolving it opens a socket; do it once
+        self._session_details_cache = None  # Rebuilt on the first copy after a session change
+        self._qr_photo = None  # Single QR PhotoImage, pasted over for each new session
+        self.teacher_ip = self._local_ip
+        self._teacher_ip_label = None
         self.password_hidden = True
         
         # Header variables
@@ -63,9 +151,13 @@ class TeacherApp:
         self.violations_header_var = tk.StringVar(value="0")
         
         # Status variables
-        self.status_var = tk.StringVar(value="Ready")
-        self.network_status_var = tk.StringVar(value="Network: Ready")
-        self.ports_status_var = tk.StringVar(value="Ports: Not started")
+        self.status_var = tk.StringVar(value="Ready - Start a session to begin")
+        
+        # Rarely changing labels are updated directly through their setters
+        self.network_status = "Network: Ready"
+        self.ports_status = "Ports: Not started"
+        self._network_status_label = None
+        self._ports_status_label = None
         
         # Statistics variables
         self.duration_var = tk.StringVar(value="00:00:00")
@@ -76,12 +168,44 @@ class TeacherApp:
         # Activity log variables
         self.activity_filter_var = tk.StringVar(value="All")
         self.auto_scroll_var = tk.BooleanVar(value=True)
+        self._auto_scroll = True  # Mirrors auto_scroll_var without a Tcl read per flush
         self.total_activities_var = tk.StringVar(value="Total Activities: 0")
-        
-        # Student management
-        self.connected_students = {}
-        self.violation_throttle = {}
+        self._pending_log_lines = []  # (text, tag) pairs awaiting the next idle flush
+        self._log_flush_scheduled = False
+        self._log_lines = deque(maxlen=TEACHER_ACTIVITY_LOG_MAX_LINES)  # (text, tag) pairs for counts, export and filtering
+        self._log_widget_lines = 0
+        self._log_trim_scheduled = False
+        self._log_filter_tags = None  # Tags currently shown, None for all
+        self._ts_prefix = TimestampPrefix()
+        self._log_stale = False  # Lines were logged while hidden; redraw the widget on reveal
+        
+        # Student management: one column per field, rows located through _client_index
+        self._client_ids: List[str] = []
+        self._student_names: List[str] = []
+        self._student_ips: List[str] = []
+        self._student_db_ids: List[int] = []
+        self._student_violations: List[int] = []
+        self._student_connected_at: List[float] = []  # time.monotonic() at connect
+        self._student_codecs: List[List[str]] = []  # Decodable screen share codecs, most preferred first
+        self._student_columns = (
+            self._client_ids, self._student_names, self._student_ips, self._student_db_ids,
+            self._student_violations, self._student_connected_at, self._student_codecs
+        )
+        self._client_index: Dict[str, int] = {}
+        # The async loop is the only writer of the roster; it holds this while mutating and the Tk thread while reading
+        self._roster_lock = threading.Lock()
+        self._total_violations = 0  # Running sum of _student_violations
+        self._ui_refresh_scheduled = False
+        self._tree_dirty = False
+        self._window_visible = True  # Tracked via <Map>/<Unmap>; widget updates wait while hidden
+        self._tree_rows: Dict[str, tuple] = {}  # Values currently shown in students_tree, by client id
+        self.violation_throttle = OrderedDict()  # (client_id, type) -> _ThrottleWindow, oldest first
         self.violation_cooldown = 5.0
+        self._violation_rows = []  # Accepted violations awaiting the next database flush
+        self._violation_flush_handle = None
+        self._violation_flush_task: Optional[asyncio.Task] = None  # Timer-started flush, kept referenced until done
+        self._elapsed_seconds = 0
+        self._last_ui_state = {"students": None, "violations": None, "header_status": None, "activities": None}
         
         # Setup UI and handlers
         self.setup_ui()
@@ -107,30 +231,33 @@ class TeacherApp:
     
     def create_enhanced_main_layout(self):
         """Create enhanced main layout with more features"""
+        bg = TKINTER_THEME["bg_color"]
+        fg = TKINTER_THEME["fg_color"]
+        accent = TKINTER_THEME["accent_color"]
+        
         # Main container with improved styling
-        main_frame = tk.Frame(self.root, bg=TKINTER_THEME["bg_color"])
+        main_frame = tk.Frame(self.root, bg=bg)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=15)
         
         # Header section with logo and session info
-        header_frame = tk.Frame(main_frame, bg=TKINTER_THEME["bg_color"], height=80)
+        header_frame = tk.Frame(main_frame, bg=bg, height=80)
         header_frame.pack(fill=tk.X, pady=(0, 15))
         header_frame.pack_propagate(False)
         
         # Title and status
-        title_frame = tk.Frame(header_frame, bg=TKINTER_THEME["bg_color"])
+        title_frame = tk.Frame(header_frame, bg=bg)
         title_frame.pack(side=tk.LEFT, fill=tk.Y)
         
         tk.Label(title_frame, text="📚 FocusClass Teacher Dashboard", 
-                bg=TKINTER_THEME["bg_color"], fg=TKINTER_THEME["accent_color"],
-                font=(TKINTER_THEME["font_family"], 20, "bold")).pack(anchor="w")
+                bg=bg, fg=accent,
+                font=FONT_TITLE).pack(anchor="w")
         
-        self.header_status_var = tk.StringVar(value="Ready to start session")
         tk.Label(title_frame, textvariable=self.header_status_var,
-                bg=TKINTER_THEME["bg_color"], fg=TKINTER_THEME["fg_color"],
-                font=(TKINTER_THEME["font_family"], 12)).pack(anchor="w")
+                bg=bg, fg=fg,
+                font=FONT_SUBTITLE).pack(anchor="w")
         
         # Session stats in header
-        stats_header_frame = tk.Frame(header_frame, bg=TKINTER_THEME["bg_color"])
+        stats_header_frame = tk.Frame(header_frame, bg=bg)
         stats_header_frame.pack(side=tk.RIGHT, fill=tk.Y, padx=(20, 0))
         
         # Quick stats display
@@ -139,37 +266,40 @@ class TeacherApp:
         
         # Stats grid
         tk.Label(quick_stats_frame, text="Session Duration:", bg="white", font=("Arial", 9)).grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        self.duration_header_var = tk.StringVar(value="00:00:00")
         tk.Label(quick_stats_frame, textvariable=self.duration_header_var, bg="white", font=("Arial", 9, "bold")).grid(row=0, column=1, sticky="w", padx=5)
         
         tk.Label(quick_stats_frame, text="Students:", bg="white", font=("Arial", 9)).grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        self.students_header_var = tk.StringVar(value="0")
         tk.Label(quick_stats_frame, textvariable=self.students_header_var, bg="white", font=("Arial", 9, "bold")).grid(row=1, column=1, sticky="w", padx=5)
         
         tk.Label(quick_stats_frame, text="Violations:", bg="white", font=("Arial", 9)).grid(row=2, column=0, sticky="w", padx=5, pady=2)
-        self.violations_header_var = tk.StringVar(value="0")
         tk.Label(quick_stats_frame, textvariable=self.violations_header_var, bg="white", font=("Arial", 9, "bold")).grid(row=2, column=1, sticky="w", padx=5)
         
-        # Main content area with three columns
-        content_frame = tk.Frame(main_frame, bg=TKINTER_THEME["bg_color"])
+        # Main content area with three columns; only the center one stretches
+        content_frame = tk.Frame(main_frame, bg=bg)
         content_frame.pack(fill=tk.BOTH, expand=True)
+        content_frame.grid_rowconfigure(0, weight=1)
+        content_frame.grid_columnconfigure(1, weight=1)
         
         # Left panel - Session controls (30%)
-        left_frame = tk.Frame(content_frame, bg=TKINTER_THEME["bg_color"], width=400)
-        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
+        left_frame = tk.Frame(content_frame, bg=bg, width=400)
+        left_frame.grid(row=0, column=0, sticky="ns", padx=(0, 10))
         left_frame.pack_propagate(False)
         
         # Center panel - Students and monitoring (40%)
-        center_frame = tk.Frame(content_frame, bg=TKINTER_THEME["bg_color"])
-        center_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10))
+        center_frame = tk.Frame(content_frame, bg=bg)
+        center_frame.grid(row=0, column=1, sticky="nsew", padx=(0, 10))
         
         # Right panel - Activities and logs (30%)
-        right_frame = tk.Frame(content_frame, bg=TKINTER_THEME["bg_color"], width=350)
-        right_frame.pack(side=tk.RIGHT, fill=tk.Y)
+        right_frame = tk.Frame(content_frame, bg=bg, width=350)
+        right_frame.grid(row=0, column=2, sticky="ns")
         right_frame.pack_propagate(False)
         
-        # Build panels
+        # Build the session controls now; the rest waits until the window has painted
         self.create_session_control_panel(left_frame)
+        self.root.after_idle(self._create_deferred_panels, center_frame, right_frame)
+    
+    def _create_deferred_panels(self, center_frame, right_frame):
+        """Build the monitoring and activity panels and the status bar"""
         self.create_monitoring_panel(center_frame)
         self.create_activity_panel(right_frame)
         
@@ -178,48 +308,51 @@ class TeacherApp:
     
     def create_session_control_panel(self, parent):
         """Create enhanced session control panel"""
+        bg = TKINTER_THEME["bg_color"]
+        accent = TKINTER_THEME["accent_color"]
+        success = TKINTER_THEME["success_color"]
+        warning = TKINTER_THEME["warning_color"]
+        error = TKINTER_THEME["error_color"]
+        
         # Session information group with enhanced styling
         session_group = tk.LabelFrame(parent, text="📋 Session Information", 
-                                     bg=TKINTER_THEME["bg_color"], 
-                                     font=(TKINTER_THEME["font_family"], 12, "bold"),
+                                     bg=bg, 
+                                     font=FONT_H2,
                                      relief=tk.RAISED, bd=2)
         session_group.pack(fill=tk.X, pady=(0, 10))
         
         # Session details with improved layout
-        info_frame = tk.Frame(session_group, bg=TKINTER_THEME["bg_color"])
+        info_frame = tk.Frame(session_group, bg=bg)
         info_frame.pack(fill=tk.X, padx=10, pady=10)
         
         # Session code with copy button
-        code_frame = tk.Frame(info_frame, bg=TKINTER_THEME["bg_color"])
+        code_frame = tk.Frame(info_frame, bg=bg)
         code_frame.pack(fill=tk.X, pady=2)
         
-        tk.Label(code_frame, text="Session Code:", bg=TKINTER_THEME["bg_color"], 
+        tk.Label(code_frame, text="Session Code:", bg=bg, 
                 font=("Arial", 10, "bold")).pack(side=tk.LEFT)
         
-        self.session_code_var = tk.StringVar(value="Not Started")
         code_label = tk.Label(code_frame, textvariable=self.session_code_var, 
                              bg="white", fg="black", relief=tk.SUNKEN, bd=1,
                              font=("Courier", 12, "bold"), padx=5)
         code_label.pack(side=tk.LEFT, padx=(10, 5), fill=tk.X, expand=True)
         
         copy_btn = tk.Button(code_frame, text="📋", command=self.copy_session_code,
-                            bg=TKINTER_THEME["accent_color"], fg="white", width=3)
+                            bg=accent, fg="white", width=3)
         copy_btn.pack(side=tk.RIGHT)
         
         # Copy all details button
         copy_all_btn = tk.Button(code_frame, text="📄", command=self.copy_all_session_details,
-                                bg=TKINTER_THEME["success_color"], fg="white", width=3)
+                                bg=success, fg="white", width=3)
         copy_all_btn.pack(side=tk.RIGHT, padx=(5, 0))
         
         # Password with show/hide
-        pass_frame = tk.Frame(info_frame, bg=TKINTER_THEME["bg_color"])
+        pass_frame = tk.Frame(info_frame, bg=bg)
         pass_frame.pack(fill=tk.X, pady=2)
         
-        tk.Label(pass_frame, text="Password:", bg=TKINTER_THEME["bg_color"], 
+        tk.Label(pass_frame, text="Password:", bg=bg, 
                 font=("Arial", 10, "bold")).pack(side=tk.LEFT)
         
-        self.session_password_var = tk.StringVar(value="")
-        self.password_display_var = tk.StringVar(value="")
         self.password_hidden = True
         
         pass_label = tk.Label(pass_frame, textvariable=self.password_display_var, 
@@ -228,24 +361,24 @@ class TeacherApp:
         pass_label.pack(side=tk.LEFT, padx=(10, 5), fill=tk.X, expand=True)
         
         self.show_pass_btn = tk.Button(pass_frame, text="👁", command=self.toggle_password_visibility,
-                                      bg=TKINTER_THEME["warning_color"], fg="white", width=3)
+                                      bg=warning, fg="white", width=3)
         self.show_pass_btn.pack(side=tk.RIGHT)
         
         # IP and ports
-        tk.Label(info_frame, text="Teacher IP:", bg=TKINTER_THEME["bg_color"], 
+        tk.Label(info_frame, text="Teacher IP:", bg=bg, 
                 font=("Arial", 10, "bold")).pack(anchor="w", pady=(5, 0))
         
-        self.teacher_ip_var = tk.StringVar(value=get_local_ip())
-        tk.Label(info_frame, textvariable=self.teacher_ip_var, 
+        self._teacher_ip_label = tk.Label(info_frame, text=self.teacher_ip, 
                 bg="white", relief=tk.SUNKEN, bd=1, padx=5,
-                font=("Courier", 11)).pack(fill=tk.X, pady=(2, 5))
+                font=("Courier", 11))
+        self._teacher_ip_label.pack(fill=tk.X, pady=(2, 5))
         
         # QR Code with improved styling
-        qr_frame = tk.Frame(session_group, bg=TKINTER_THEME["bg_color"], relief=tk.SUNKEN, bd=2)
+        qr_frame = tk.Frame(session_group, bg=bg, relief=tk.SUNKEN, bd=2)
         qr_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
         
         tk.Label(qr_frame, text="QR Code for Quick Connect", 
-                bg=TKINTER_THEME["bg_color"], font=("Arial", 10, "bold")).pack(pady=5)
+                bg=bg, font=("Arial", 10, "bold")).pack(pady=5)
         
         self.qr_label = tk.Label(qr_frame, bg="white", text="Start session to generate QR code",
                                 font=("Arial", 9), width=25, height=8, relief=tk.SUNKEN, bd=1)
@@ -253,18 +386,18 @@ class TeacherApp:
         
         # Enhanced control buttons
         controls_group = tk.LabelFrame(parent, text="🎮 Session Controls", 
-                                      bg=TKINTER_THEME["bg_color"],
-                                      font=(TKINTER_THEME["font_family"], 12, "bold"),
+                                      bg=bg,
+                                      font=FONT_H2,
                                       relief=tk.RAISED, bd=2)
         controls_group.pack(fill=tk.X, pady=(0, 10))
         
-        btn_frame = tk.Frame(controls_group, bg=TKINTER_THEME["bg_color"])
+        btn_frame = tk.Frame(controls_group, bg=bg)
         btn_frame.pack(fill=tk.X, padx=10, pady=10)
         
         # Start session button
         self.start_btn = tk.Button(btn_frame, text="🚀 Start New Session", 
                                   command=self.start_session,
-                                  bg=TKINTER_THEME["success_color"], fg="white",
+                                  bg=success, fg="white",
                                   font=("Arial", 11, "bold"), height=2,
                                   relief=tk.RAISED, bd=3)
         self.start_btn.pack(fill=tk.X, pady=2)
@@ -272,7 +405,7 @@ class TeacherApp:
         # Screen sharing button
         self.screen_btn = tk.Button(btn_frame, text="📺 Start Screen Sharing", 
                                    command=self.start_screen_sharing,
-                                   bg=TKINTER_THEME["accent_color"], fg="white",
+                                   bg=accent, fg="white",
                                    font=("Arial", 10), state=tk.DISABLED,
                                    relief=tk.RAISED, bd=2)
         self.screen_btn.pack(fill=tk.X, pady=2)
@@ -280,7 +413,7 @@ class TeacherApp:
         # Focus mode button
         self.focus_btn = tk.Button(btn_frame, text="🔒 Enable Focus Mode", 
                                   command=self.enable_focus_mode,
-                                  bg=TKINTER_THEME["warning_color"], fg="white",
+                                  bg=warning, fg="white",
                                   font=("Arial", 10), state=tk.DISABLED,
                                   relief=tk.RAISED, bd=2)
         self.focus_btn.pack(fill=tk.X, pady=2)
@@ -288,58 +421,62 @@ class TeacherApp:
         # End session button
         self.end_btn = tk.Button(btn_frame, text="🛑 End Session", 
                                 command=self.end_session,
-                                bg=TKINTER_THEME["error_color"], fg="white",
+                                bg=error, fg="white",
                                 font=("Arial", 10), state=tk.DISABLED,
                                 relief=tk.RAISED, bd=2)
         self.end_btn.pack(fill=tk.X, pady=2)
         
         # Additional controls
         extra_controls = tk.LabelFrame(parent, text="🔧 Additional Tools", 
-                                      bg=TKINTER_THEME["bg_color"],
-                                      font=(TKINTER_THEME["font_family"], 10, "bold"))
+                                      bg=bg,
+                                      font=FONT_H3)
         extra_controls.pack(fill=tk.X, pady=(0, 10))
         
-        extra_btn_frame = tk.Frame(extra_controls, bg=TKINTER_THEME["bg_color"])
+        extra_btn_frame = tk.Frame(extra_controls, bg=bg)
         extra_btn_frame.pack(fill=tk.X, padx=10, pady=5)
         
         # Export button
         export_btn = tk.Button(extra_btn_frame, text="📊 Export Data", 
                               command=self.export_session_data,
-                              bg=TKINTER_THEME["bg_color"], 
+                              bg=bg, 
                               relief=tk.RAISED, bd=1)
         export_btn.pack(fill=tk.X, pady=1)
         
         # Clear logs button
         clear_btn = tk.Button(extra_btn_frame, text="🗑️ Clear Logs", 
                              command=self.clear_activity_log,
-                             bg=TKINTER_THEME["bg_color"], 
+                             bg=bg, 
                              relief=tk.RAISED, bd=1)
         clear_btn.pack(fill=tk.X, pady=1)
     
     def create_monitoring_panel(self, parent):
         """Create enhanced monitoring panel"""
+        bg = TKINTER_THEME["bg_color"]
+        accent = TKINTER_THEME["accent_color"]
+        success = TKINTER_THEME["success_color"]
+        error = TKINTER_THEME["error_color"]
+        
         # Students monitoring with enhanced features
         students_group = tk.LabelFrame(parent, text="👥 Connected Students", 
-                                      bg=TKINTER_THEME["bg_color"],
-                                      font=(TKINTER_THEME["font_family"], 12, "bold"),
+                                      bg=bg,
+                                      font=FONT_H2,
                                       relief=tk.RAISED, bd=2)
         students_group.pack(fill=tk.BOTH, expand=True, pady=(0, 10))
         
         # Students header with count
-        students_header = tk.Frame(students_group, bg=TKINTER_THEME["bg_color"])
+        students_header = tk.Frame(students_group, bg=bg)
         students_header.pack(fill=tk.X, padx=10, pady=5)
         
-        self.students_count_display_var = tk.StringVar(value="Students Connected: 0")
         tk.Label(students_header, textvariable=self.students_count_display_var,
-                bg=TKINTER_THEME["bg_color"], font=("Arial", 11, "bold")).pack(side=tk.LEFT)
+                bg=bg, font=("Arial", 11, "bold")).pack(side=tk.LEFT)
         
         # Refresh button
         refresh_btn = tk.Button(students_header, text="🔄", command=self.refresh_students,
-                               bg=TKINTER_THEME["accent_color"], fg="white", width=3)
+                               bg=accent, fg="white", width=3)
         refresh_btn.pack(side=tk.RIGHT)
         
         # Students list with scrollbar and enhanced display
-        students_frame = tk.Frame(students_group, bg=TKINTER_THEME["bg_color"])
+        students_frame = tk.Frame(students_group, bg=bg)
         students_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
         # Create Treeview for better student display
@@ -371,29 +508,29 @@ class TeacherApp:
         students_frame.grid_columnconfigure(0, weight=1)
         
         # Student actions
-        student_actions = tk.Frame(students_group, bg=TKINTER_THEME["bg_color"])
+        student_actions = tk.Frame(students_group, bg=bg)
         student_actions.pack(fill=tk.X, padx=10, pady=(0, 10))
         
         kick_btn = tk.Button(student_actions, text="⚠️ Kick Selected", 
                             command=self.kick_selected_student,
-                            bg=TKINTER_THEME["error_color"], fg="white",
+                            bg=error, fg="white",
                             font=("Arial", 9))
         kick_btn.pack(side=tk.LEFT, padx=(0, 5))
         
         message_btn = tk.Button(student_actions, text="💬 Send Message", 
                                command=self.send_message_to_selected,
-                               bg=TKINTER_THEME["accent_color"], fg="white",
+                               bg=accent, fg="white",
                                font=("Arial", 9))
         message_btn.pack(side=tk.LEFT)
         
         # Statistics panel
         stats_group = tk.LabelFrame(parent, text="📊 Session Statistics", 
-                                   bg=TKINTER_THEME["bg_color"],
-                                   font=(TKINTER_THEME["font_family"], 12, "bold"),
+                                   bg=bg,
+                                   font=FONT_H2,
                                    relief=tk.RAISED, bd=2)
         stats_group.pack(fill=tk.X)
         
-        stats_grid = tk.Frame(stats_group, bg=TKINTER_THEME["bg_color"])
+        stats_grid = tk.Frame(stats_group, bg=bg)
         stats_grid.pack(fill=tk.X, padx=15, pady=10)
         
         # Configure grid for stats
@@ -406,9 +543,8 @@ class TeacherApp:
         
         tk.Label(duration_frame, text="🕐 Duration", bg="white", 
                 font=("Arial", 10, "bold")).pack(pady=2)
-        self.duration_var = tk.StringVar(value="00:00:00")
         tk.Label(duration_frame, textvariable=self.duration_var, bg="white", 
-                font=("Arial", 14, "bold"), fg=TKINTER_THEME["accent_color"]).pack(pady=2)
+                font=("Arial", 14, "bold"), fg=accent).pack(pady=2)
         
         # Students count
         students_frame_stat = tk.Frame(stats_grid, bg="white", relief=tk.RAISED, bd=2)
@@ -416,9 +552,8 @@ class TeacherApp:
         
         tk.Label(students_frame_stat, text="👥 Students", bg="white", 
                 font=("Arial", 10, "bold")).pack(pady=2)
-        self.students_count_var = tk.StringVar(value="0")
         tk.Label(students_frame_stat, textvariable=self.students_count_var, bg="white", 
-                font=("Arial", 14, "bold"), fg=TKINTER_THEME["success_color"]).pack(pady=2)
+                font=("Arial", 14, "bold"), fg=success).pack(pady=2)
         
         # Violations count
         violations_frame = tk.Frame(stats_grid, bg="white", relief=tk.RAISED, bd=2)
@@ -426,28 +561,28 @@ class TeacherApp:
         
         tk.Label(violations_frame, text="⚠️ Violations", bg="white", 
                 font=("Arial", 10, "bold")).pack(pady=2)
-        self.violations_count_var = tk.StringVar(value="0")
         tk.Label(violations_frame, textvariable=self.violations_count_var, bg="white", 
-                font=("Arial", 14, "bold"), fg=TKINTER_THEME["error_color"]).pack(pady=2)
+                font=("Arial", 14, "bold"), fg=error).pack(pady=2)
     
     def create_activity_panel(self, parent):
         """Create enhanced activity and logs panel"""
+        bg = TKINTER_THEME["bg_color"]
+        
         # Activity log with filters
         activity_group = tk.LabelFrame(parent, text="📋 Activity Log", 
-                                      bg=TKINTER_THEME["bg_color"],
-                                      font=(TKINTER_THEME["font_family"], 12, "bold"),
+                                      bg=bg,
+                                      font=FONT_H2,
                                       relief=tk.RAISED, bd=2)
         activity_group.pack(fill=tk.BOTH, expand=True)
         
         # Activity controls
-        activity_controls = tk.Frame(activity_group, bg=TKINTER_THEME["bg_color"])
+        activity_controls = tk.Frame(activity_group, bg=bg)
         activity_controls.pack(fill=tk.X, padx=10, pady=5)
         
         # Filter options
-        tk.Label(activity_controls, text="Filter:", bg=TKINTER_THEME["bg_color"], 
+        tk.Label(activity_controls, text="Filter:", bg=bg, 
                 font=("Arial", 9)).pack(side=tk.LEFT)
         
-        self.activity_filter_var = tk.StringVar(value="All")
         filter_combo = ttk.Combobox(activity_controls, textvariable=self.activity_filter_var,
                                    values=["All", "Connections", "Violations", "Errors", "Info"],
                                    width=10, state="readonly")
@@ -455,10 +590,10 @@ class TeacherApp:
         filter_combo.bind("<<ComboboxSelected>>", self.filter_activity_log)
         
         # Auto-scroll toggle
-        self.auto_scroll_var = tk.BooleanVar(value=True)
         auto_scroll_cb = tk.Checkbutton(activity_controls, text="Auto-scroll", 
                                        variable=self.auto_scroll_var,
-                                       bg=TKINTER_THEME["bg_color"],
+                                       command=self._on_auto_scroll_toggled,
+                                       bg=bg,
                                        font=("Arial", 8))
         auto_scroll_cb.pack(side=tk.RIGHT)
         
@@ -468,10 +603,17 @@ class TeacherApp:
                                                         bg="black", 
                                                         fg="lime",
                                                         font=("Consolas", 9),
-                                                        insertbackground="lime",
+                                                        insertwidth=0,
                                                         relief=tk.SUNKEN, bd=2)
         self.activities_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
+        # Left editable so writes need no state toggling; user edits are filtered out instead
+        # Shortcuts use Command (Mod1) on macOS and Control elsewhere
+        self._log_shortcut_mask = 0x8 if self.root.tk.call("tk", "windowingsystem") == "aqua" else 0x4
+        self.activities_text.bind("<Key>", self._on_activity_key)
+        for sequence in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>", "<<Undo>>", "<<Redo>>"):
+            self.activities_text.bind(sequence, lambda e: "break")
+        
         # Configure text tags for colored output
         self.activities_text.tag_configure("info", foreground="lime")
         self.activities_text.tag_configure("warning", foreground="yellow")
@@ -480,38 +622,36 @@ class TeacherApp:
         self.activities_text.tag_configure("violation", foreground="orange")
         
         # Activity statistics
-        activity_stats = tk.Frame(activity_group, bg=TKINTER_THEME["bg_color"])
+        activity_stats = tk.Frame(activity_group, bg=bg)
         activity_stats.pack(fill=tk.X, padx=10, pady=(0, 10))
         
-        self.total_activities_var = tk.StringVar(value="Total Activities: 0")
         tk.Label(activity_stats, textvariable=self.total_activities_var,
-                bg=TKINTER_THEME["bg_color"], font=("Arial", 8)).pack(side=tk.LEFT)
+                bg=bg, font=("Arial", 8)).pack(side=tk.LEFT)
         
     def create_enhanced_status_bar(self):
         """Create enhanced status bar with more information"""
-        status_frame = tk.Frame(self.root, bg=TKINTER_THEME["bg_color"], relief=tk.SUNKEN, bd=1)
+        bg = TKINTER_THEME["bg_color"]
+        
+        status_frame = tk.Frame(self.root, bg=bg, relief=tk.SUNKEN, bd=1)
         status_frame.pack(side=tk.BOTTOM, fill=tk.X)
         
         # Main status
-        self.status_var = tk.StringVar(value="Ready - Start a session to begin")
         status_main = tk.Label(status_frame, textvariable=self.status_var, 
-                              bg=TKINTER_THEME["bg_color"], anchor=tk.W,
+                              bg=bg, anchor=tk.W,
                               font=("Arial", 9))
         status_main.pack(side=tk.LEFT, padx=5)
         
         # Network status
-        self.network_status_var = tk.StringVar(value="Network: Ready")
-        network_status = tk.Label(status_frame, textvariable=self.network_status_var,
-                                 bg=TKINTER_THEME["bg_color"], 
+        self._network_status_label = tk.Label(status_frame, text=self.network_status,
+                                 bg=bg, 
                                  font=("Arial", 9))
-        network_status.pack(side=tk.RIGHT, padx=5)
+        self._network_status_label.pack(side=tk.RIGHT, padx=5)
         
         # Server ports
-        self.ports_status_var = tk.StringVar(value="Ports: Not started")
-        ports_status = tk.Label(status_frame, textvariable=self.ports_status_var,
-                               bg=TKINTER_THEME["bg_color"], 
+        self._ports_status_label = tk.Label(status_frame, text=self.ports_status,
+                               bg=bg, 
                                font=("Arial", 9))
-        ports_status.pack(side=tk.RIGHT, padx=5)
+        self._ports_status_label.pack(side=tk.RIGHT, padx=5)
     
     def copy_session_code(self):
         """Copy session code to clipboard"""
@@ -520,7 +660,8 @@ class TeacherApp:
             if session_code and session_code != "Not Started":
                 self.root.clipboard_clear()
                 self.root.clipboard_append(session_code)
-                self.root.update()  # Required for clipboard to work
+                if sys.platform.startswith("linux"):
+                    self.root.update_idletasks()  # Let X11 claim clipboard ownership
                 show_info_message("Copied", f"Session code '{session_code}' copied to clipboard!")
             else:
                 show_error_message("Error", "No active session code to copy")
@@ -530,16 +671,36 @@ class TeacherApp:
     def copy_all_session_details(self):
         """Copy all session details to clipboard"""
         try:
-            session_code = self.session_code_var.get()
-            password = self.session_password_var.get()
-            teacher_ip = self.teacher_ip_var.get()
+            if self._session_details_cache is None:
+                self._session_details_cache = self._build_session_details()
+            details = self._session_details_cache
             
-            if session_code and session_code != "Not Started":
-                # Get current port information
-                ws_port = getattr(self.network_manager, 'websocket_port', 8765)
-                http_port = getattr(self.network_manager, 'http_port', 8080)
+            if details:
+                self.root.clipboard_clear()
+                self.root.clipboard_append(details)
                 
-                details = f"""FocusClass Session Details
+                show_info_message("Copied", "All session details copied to clipboard!\nYou can now share this with students.")
+                self._add_activity_log("Session details copied to clipboard", "info")
+            else:
+                show_error_message("Error", "No active session to copy")
+        except Exception as e:
+            self.logger.error(f"Error copying session details: {e}")
+            show_error_message("Error", f"Failed to copy session details: {e}")
+    
+    def _build_session_details(self) -> str:
+        """Assemble the shareable session details text, or an empty string without a session"""
+        session_code = self.session_code_var.get()
+        password = self.session_password_var.get()
+        teacher_ip = self.teacher_ip
+        
+        if not session_code or session_code == "Not Started":
+            return ""
+        
+        # Get current port information
+        ws_port = getattr(self.network_manager, 'websocket_port', 8765)
+        http_port = getattr(self.network_manager, 'http_port', 8080)
+        
+        return f"""FocusClass Session Details
 =============================
 Session Code: {session_code}
 Password: {password}
@@ -556,18 +717,6 @@ Instructions for Students:
 6. Click Connect
 
 Alternatively, scan the QR code from the teacher dashboard."""
-                
-                self.root.clipboard_clear()
-                self.root.clipboard_append(details)
-                self.root.update()  # Required for clipboard to work
-                
-                show_info_message("Copied", "All session details copied to clipboard!\nYou can now share this with students.")
-                self._add_activity_log("Session details copied to clipboard", "info")
-            else:
-                show_error_message("Error", "No active session to copy")
-        except Exception as e:
-            self.logger.error(f"Error copying session details: {e}")
-            show_error_message("Error", f"Failed to copy session details: {e}")
     
     def toggle_password_visibility(self):
         """Toggle password visibility"""
@@ -597,26 +746,21 @@ Alternatively, scan the QR code from the teacher dashboard."""
                 show_error_message("Error", "Please select a student to kick")
                 return
             
-            item = self.students_tree.item(selection[0])
-            student_name = item['values'][0]
+            # Tree rows are keyed by client id
+            client_id = selection[0]
+            student_name = self._roster_name(client_id)
+            if student_name is None:
+                return  # Student left before the tree caught up
             
             if ask_yes_no("Confirm", f"Kick student '{student_name}' from the session?"):
-                # Find student by name and disconnect
-                for client_id, student_info in self.connected_students.items():
-                    if student_info['name'] == student_name:
-                        def run_async_task():
-                            try:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                loop.run_until_complete(self.network_manager._send_message(client_id, "kicked", {
-                                    "reason": "Removed by teacher"
-                                }))
-                            finally:
-                                loop.close()
-                        
-                        threading.Thread(target=run_async_task, daemon=True).start()
+                if client_id in self._client_index:
+                    queued = self.network_manager.queue_message_threadsafe(client_id, "kicked", {
+                        "reason": "Removed by teacher"
+                    })
+                    if queued:
                         self._add_activity_log(f"⚠️ Kicked student: {student_name}", "warning")
-                        break
+                    else:
+                        show_error_message("Error", "Failed to kick student: the session server is not running")
         except Exception as e:
             self.logger.error(f"Error kicking student: {e}")
             show_error_message("Error", f"Failed to kick student: {e}")
@@ -629,206 +773,229 @@ Alternatively, scan the QR code from the teacher dashboard."""
                 show_error_message("Error", "Please select a student to message")
                 return
             
-            item = self.students_tree.item(selection[0])
-            student_name = item['values'][0]
+            # Tree rows are keyed by client id
+            client_id = selection[0]
+            student_name = self._roster_name(client_id)
+            if student_name is None:
+                return  # Student left before the tree caught up
+            
+            # Create message dialog; it does not block the event loop while the teacher types
+            dialog = tk.Toplevel(self.root)
+            dialog.title("Send Message")
+            dialog.transient(self.root)
+            dialog.resizable(False, False)
+            
+            tk.Label(dialog, text=f"Message to {student_name}:").pack(anchor="w", padx=10, pady=(10, 2))
+            entry = tk.Entry(dialog, width=40)
+            entry.pack(fill=tk.X, padx=10)
+            entry.focus_set()
             
-            # Create message dialog
-            message = tk.simpledialog.askstring("Send Message", 
-                                               f"Message to {student_name}:",
-                                               parent=self.root)
+            def send(event=None):
+                message = entry.get()
+                dialog.destroy()
+                self._dispatch_message(client_id, student_name, message)
             
-            if message:
-                # Find student and send message
-                for client_id, student_info in self.connected_students.items():
-                    if student_info['name'] == student_name:
-                        def run_async_task():
-                            try:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                loop.run_until_complete(self.network_manager._send_message(client_id, "teacher_message", {
-                                    "message": message,
-                                    "timestamp": time.time()
-                                }))
-                            finally:
-                                loop.close()
-                        
-                        threading.Thread(target=run_async_task, daemon=True).start()
-                        self._add_activity_log(f"💬 Sent message to {student_name}: {message}", "info")
-                        break
+            buttons = tk.Frame(dialog)
+            buttons.pack(pady=10)
+            tk.Button(buttons, text="OK", width=8, command=send).pack(side=tk.LEFT, padx=5)
+            tk.Button(buttons, text="Cancel", width=8, command=dialog.destroy).pack(side=tk.LEFT, padx=5)
+            dialog.bind("<Return>", send)
+            dialog.bind("<Escape>", lambda event: dialog.destroy())
         except Exception as e:
             self.logger.error(f"Error sending message: {e}")
     
+    def _dispatch_message(self, client_id: str, student_name: str, message: str):
+        """Queue a teacher message for a student who is still connected"""
+        if message and client_id in self._client_index:
+            queued = self.network_manager.queue_message_threadsafe(client_id, "teacher_message", {
+                "message": message,
+                "timestamp": time.time()
+            })
+            if queued:
+                self._add_activity_log(f"💬 Sent message to {student_name}: {message}", "info")
+            else:
+                show_error_message("Error", "Failed to send message: the session server is not running")
+    
     def filter_activity_log(self, event=None):
         """Filter activity log based on selected filter"""
         try:
-            filter_type = self.activity_filter_var.get().lower()
-            # This is a placeholder - in a full implementation, you'd store
-            # log entries with types and filter them
-            self._add_activity_log(f"🔍 Filter applied: {filter_type}", "info")
+            tags = self.ACTIVITY_FILTER_TAGS.get(self.activity_filter_var.get())
+            if tags == self._log_filter_tags:
+                return  # Same filter re-selected; the widget already shows it
+            self._log_filter_tags = tags
+            self._replay_activity_log()
         except Exception as e:
             self.logger.error(f"Error filtering activity log: {e}")
-        """Create main layout"""
-        # Main container
-        main_frame = tk.Frame(self.root, bg=TKINTER_THEME["bg_color"])
-        main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        # Left panel - Session controls
-        left_frame = tk.Frame(main_frame, bg=TKINTER_THEME["bg_color"], width=400)
-        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=(0, 10))
-        
-        # Session info group
-        session_group = tk.LabelFrame(left_frame, text="Session Information", bg=TKINTER_THEME["bg_color"])
-        session_group.pack(fill=tk.X, pady=5)
-        
-        # Session details
-        self.session_code_var = tk.StringVar(value="Not Started")
-        self.session_password_var = tk.StringVar(value="")
-        self.teacher_ip_var = tk.StringVar(value=get_local_ip())
-        
-        tk.Label(session_group, text="Code:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=0, sticky="w", padx=5, pady=2)
-        tk.Label(session_group, textvariable=self.session_code_var, bg=TKINTER_THEME["bg_color"], font=("Arial", 12, "bold")).grid(row=0, column=1, sticky="w", padx=5)
-        
-        tk.Label(session_group, text="Password:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=0, sticky="w", padx=5, pady=2)
-        tk.Label(session_group, textvariable=self.session_password_var, bg=TKINTER_THEME["bg_color"]).grid(row=1, column=1, sticky="w", padx=5)
-        
-        tk.Label(session_group, text="IP:", bg=TKINTER_THEME["bg_color"]).grid(row=2, column=0, sticky="w", padx=5, pady=2)
-        tk.Label(session_group, textvariable=self.teacher_ip_var, bg=TKINTER_THEME["bg_color"]).grid(row=2, column=1, sticky="w", padx=5)
-        
-        # QR Code
-        self.qr_label = tk.Label(session_group, bg=TKINTER_THEME["bg_color"], text="QR Code")
-        self.qr_label.grid(row=3, column=0, columnspan=2, pady=10)
-        
-        # Control buttons
-        controls_group = tk.LabelFrame(left_frame, text="Controls", bg=TKINTER_THEME["bg_color"])
-        controls_group.pack(fill=tk.X, pady=5)
-        
-        self.start_btn = tk.Button(controls_group, text="📚 Start Session", command=self.start_session, 
-                                  bg=TKINTER_THEME["success_color"], fg="white")
-        self.start_btn.pack(fill=tk.X, padx=5, pady=2)
-        
-        self.screen_btn = tk.Button(controls_group, text="📺 Start Screen Sharing", command=self.start_screen_sharing,
-                                   bg=TKINTER_THEME["accent_color"], fg="white", state=tk.DISABLED)
-        self.screen_btn.pack(fill=tk.X, padx=5, pady=2)
-        
-        self.focus_btn = tk.Button(controls_group, text="🔒 Enable Focus Mode", command=self.enable_focus_mode,
-                                  bg=TKINTER_THEME["warning_color"], fg="white", state=tk.DISABLED)
-        self.focus_btn.pack(fill=tk.X, padx=5, pady=2)
-        
-        self.end_btn = tk.Button(controls_group, text="🛑 End Session", command=self.end_session,
-                                bg=TKINTER_THEME["error_color"], fg="white", state=tk.DISABLED)
-        self.end_btn.pack(fill=tk.X, padx=5, pady=2)
-        
-        # Right panel - Students and activities
-        right_frame = tk.Frame(main_frame, bg=TKINTER_THEME["bg_color"])
-        right_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
-        
-        # Notebook for tabs
-        notebook = ttk.Notebook(right_frame)
-        notebook.pack(fill=tk.BOTH, expand=True)
-        
-        # Students tab
-        students_frame = tk.Frame(notebook, bg=TKINTER_THEME["bg_color"])
-        notebook.add(students_frame, text="Students")
-        
-        tk.Label(students_frame, text="Connected Students", bg=TKINTER_THEME["bg_color"], 
-                font=("Arial", 14, "bold")).pack(pady=5)
-        
-        self.students_listbox = tk.Listbox(students_frame, bg="white", font=("Arial", 10))
-        self.students_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Activities tab
-        activities_frame = tk.Frame(notebook, bg=TKINTER_THEME["bg_color"])
-        notebook.add(activities_frame, text="Activities")
-        
-        tk.Label(activities_frame, text="Violations & Activities", bg=TKINTER_THEME["bg_color"], 
-                font=("Arial", 14, "bold")).pack(pady=5)
-        
-        self.activities_text = scrolledtext.ScrolledText(activities_frame, height=25, bg="white", font=("Consolas", 9))
-        self.activities_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Statistics tab
-        stats_frame = tk.Frame(notebook, bg=TKINTER_THEME["bg_color"])
-        notebook.add(stats_frame, text="Statistics")
-        
-        tk.Label(stats_frame, text="Session Statistics", bg=TKINTER_THEME["bg_color"], 
-                font=("Arial", 14, "bold")).pack(pady=5)
-        
-        stats_grid = tk.Frame(stats_frame, bg=TKINTER_THEME["bg_color"])
-        stats_grid.pack(padx=20, pady=20)
-        
-        tk.Label(stats_grid, text="Duration:", bg=TKINTER_THEME["bg_color"]).grid(row=0, column=0, sticky="w", padx=5, pady=5)
-        self.duration_var = tk.StringVar(value="00:00:00")
-        tk.Label(stats_grid, textvariable=self.duration_var, bg=TKINTER_THEME["bg_color"], font=("Arial", 12, "bold")).grid(row=0, column=1, sticky="w", padx=5)
-        
-        tk.Label(stats_grid, text="Students:", bg=TKINTER_THEME["bg_color"]).grid(row=1, column=0, sticky="w", padx=5, pady=5)
-        self.students_count_var = tk.StringVar(value="0")
-        tk.Label(stats_grid, textvariable=self.students_count_var, bg=TKINTER_THEME["bg_color"], font=("Arial", 12, "bold")).grid(row=1, column=1, sticky="w", padx=5)
-        
-        tk.Label(stats_grid, text="Violations:", bg=TKINTER_THEME["bg_color"]).grid(row=2, column=0, sticky="w", padx=5, pady=5)
-        self.violations_count_var = tk.StringVar(value="0")
-        tk.Label(stats_grid, textvariable=self.violations_count_var, bg=TKINTER_THEME["bg_color"], font=("Arial", 12, "bold")).grid(row=2, column=1, sticky="w", padx=5)
-        
-        # Status bar
-        self.status_var = tk.StringVar(value="Ready")
-        status_bar = tk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, bd=1, 
-                             bg=TKINTER_THEME["bg_color"], anchor=tk.W)
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+    
+    def _replay_activity_log(self):
+        """Redraw the widget from the retained log through the active filter with a single insert"""
+        tags = self._log_filter_tags
+        lines = [line for line in self._log_lines if tags is None or line[1] in tags]
+        txt = self.activities_text
+        txt.delete(1.0, tk.END)
+        if lines:
+            txt.insert(tk.END, *_tag_runs(lines))
+        self._log_widget_lines = len(lines)
+        
+        if self._auto_scroll:
+            txt.see(tk.END)
+    
+    def _on_activity_key(self, event):
+        """Keep the activity log read-only while still allowing navigation, shortcuts and focus traversal"""
+        keysym = event.keysym
+        shortcut = event.state & self._log_shortcut_mask
+        
+        # Text binds a plain Tab to inserting one; move focus instead like other widgets
+        if keysym in ("Tab", "ISO_Left_Tab") and not shortcut:
+            backwards = keysym == "ISO_Left_Tab" or event.state & 0x1
+            target = event.widget.tk_focusPrev() if backwards else event.widget.tk_focusNext()
+            if target is not None:
+                target.focus_set()
+            return "break"
+        
+        if keysym in self.LOG_NAV_KEYS or (shortcut and keysym not in self.LOG_EDIT_SHORTCUT_KEYS):
+            return None  # Copy, select-all and caret movement run through the Text class bindings
+        return "break"
+    
+    def _on_auto_scroll_toggled(self):
+        """Remember the Auto-scroll setting and jump to the newest line when it is enabled"""
+        self._auto_scroll = self.auto_scroll_var.get()
+        if self._auto_scroll:
+            self.activities_text.see(tk.END)
     
     def setup_network_handlers(self):
         """Setup network message handlers"""
-        self.network_manager.register_message_handler("authenticate", self.handle_student_authentication)
-        self.network_manager.register_message_handler("violation", self.handle_violation)
-        self.network_manager.register_connection_handler("disconnection", self.handle_student_disconnection)
+        self.network_manager.register_message_handlers({
+            "authenticate": self.handle_student_authentication,
+            "violation": self.handle_violation,
+            "violations_batch": self.handle_violations_batch
+        })
+        self.network_manager.register_connection_handlers({
+            "disconnection": self.handle_student_disconnection
+        })
     
     def start_periodic_updates(self):
-        """Start periodic UI updates"""
-        def update():
-            if self.session_active:
-                # Update session duration
-                duration = time.time() - self.session_start_time
-                duration_str = format_duration(duration)
+        """Start periodic session duration updates"""
+        self._duration_tick_id = None
+        self.root.bind("<Map>", self._on_root_map, add="+")
+        self.root.bind("<Unmap>", self._on_root_unmap, add="+")
+        self._update_duration()
+    
+    def _on_root_map(self, event):
+        """Catch up on the clock, tree and activity log once the window is shown again"""
+        if event.widget is self.root and not self._window_visible:
+            self._window_visible = True
+            self._restart_periodic_updates()
+            self._request_ui_refresh()
+            if self._log_stale:
+                self._log_stale = False
+                self._replay_activity_log()
+                self._update_activity_count()
+    
+    def _on_root_unmap(self, event):
+        """Note that the window was minimized or withdrawn"""
+        if event.widget is self.root:
+            self._window_visible = False
+    
+    def _restart_periodic_updates(self):
+        """Run the duration tick now instead of waiting out the current interval"""
+        if self._duration_tick_id is not None:
+            self.root.after_cancel(self._duration_tick_id)
+        self._update_duration()
+    
+    def _update_duration(self):
+        """Refresh the session clock and schedule the next tick"""
+        if self.session_active and self._window_visible:
+            elapsed = time.monotonic() - self.session_start_monotonic
+            
+            # Only touch the labels when the displayed second changes
+            seconds = int(elapsed)
+            if seconds != self._elapsed_seconds:
+                self._elapsed_seconds = seconds
+                hours, rest = divmod(seconds, 3600)
+                minutes, seconds = divmod(rest, 60)
+                duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
                 self.duration_var.set(duration_str)
                 self.duration_header_var.set(duration_str)
-                
-                # Update student count
-                student_count = len(self.connected_students)
-                self.students_count_var.set(str(student_count))
-                self.students_header_var.set(str(student_count))
-                self.students_count_display_var.set(f"Students Connected: {student_count}")
-                
-                # Update violations count
-                total_violations = sum(student.get('violations', 0) for student in self.connected_students.values())
-                self.violations_count_var.set(str(total_violations))
-                self.violations_header_var.set(str(total_violations))
-                
-                # Update header status
-                self.header_status_var.set(f"Session Active - {student_count} students connected")
             
-            # Schedule next update
-            self.root.after(1000, update)
+            # Next update on the next whole second of session time
+            delay = 1000 - int((elapsed % 1) * 1000)
+        else:
+            delay = self.IDLE_TICK_INTERVAL
         
-        update()
+        self._duration_tick_id = self.root.after(delay, self._update_duration)
+    
+    def _update_session_stats(self):
+        """Refresh student and violation counters after a connect, disconnect or violation"""
+        with self._roster_lock:
+            student_count = len(self._client_ids)
+            total_violations = self._total_violations
+        if self._set_if_changed("students", student_count):
+            self.students_count_var.set(str(student_count))
+            self.students_header_var.set(str(student_count))
+            self.students_count_display_var.set(f"Students Connected: {student_count}")
+        
+        if self._set_if_changed("violations", total_violations):
+            self.violations_count_var.set(str(total_violations))
+            self.violations_header_var.set(str(total_violations))
+        
+        if self.session_active:
+            header_status = f"Session Active - {student_count} students connected"
+            if self._set_if_changed("header_status", header_status):
+                self.header_status_var.set(header_status)
+    
+    def _set_if_changed(self, key: str, value) -> bool:
+        """Remember value under key, returning False if it is unchanged since the last UI write"""
+        if self._last_ui_state.get(key) == value:
+            return False
+        self._last_ui_state[key] = value
+        return True
+    
+    def set_teacher_ip(self, ip: str):
+        """Show the teacher IP, reconfiguring the label only on change"""
+        if ip != self.teacher_ip:
+            self.teacher_ip = ip
+            if self._teacher_ip_label is not None:
+                self._teacher_ip_label.config(text=ip)
+    
+    def set_network_status(self, status: str):
+        """Show the network status, reconfiguring the label only on change"""
+        if status != self.network_status:
+            self.network_status = status
+            if self._network_status_label is not None:
+                self._network_status_label.config(text=status)
+    
+    def set_ports_status(self, status: str):
+        """Show the server ports, reconfiguring the label only on change"""
+        if status != self.ports_status:
+            self.ports_status = status
+            if self._ports_status_label is not None:
+                self._ports_status_label.config(text=status)
+    
+    def _submit(self, coro):
+        """Schedule a coroutine on the persistent async loop"""
+        future = self.async_helper.run_async(coro)
+        if future is not None:
+            future.add_done_callback(self._on_submitted_done)
+        return future
+    
+    def _on_submitted_done(self, future):
+        """Hand an exception raised by a submitted coroutine back to the Tk thread"""
+        if future.cancelled() or future.exception() is None:
+            return
+        try:
+            self._post(self._report_background_error, future.exception())
+        except (tk.TclError, RuntimeError):
+            pass  # Window already destroyed
+    
+    def _report_background_error(self, error: BaseException):
+        """Log a failed background task (runs on the Tk thread)"""
+        self.logger.error(f"Background task failed: {error}")
+        self._add_activity_log(f"❌ Background task failed: {error}", "error")
     
     def start_session(self):
         """Start a new session"""
-        def run_async_task():
-            error_message = None
-            try:
-                # Create new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._start_session_async())
-            except Exception as e:
-                error_message = str(e)
-                self.logger.error(f"Error in async task: {e}")
-            finally:
-                loop.close()
-                # Show error on main thread if there was one
-                if error_message:
-                    self.root.after(0, lambda msg=error_message: show_error_message("Error", f"Failed to start session: {msg}"))
-        
-        # Use thread for async task to avoid blocking UI
-        threading.Thread(target=run_async_task, daemon=True).start()
+        self._submit(self._start_session_async())
     
     async def _start_session_async(self):
         """Async session start"""
@@ -837,25 +1004,35 @@ Alternatively, scan the QR code from the teacher dashboard."""
             
             session_code = generate_session_code()
             password = generate_session_password()
-            teacher_ip = get_local_ip()
+            teacher_ip = self._local_ip
             
             self.session_id = await self.db_manager.create_session(session_code, password, teacher_ip)
             server_info = await self.network_manager.start_teacher_server(session_code, password)
             
             self.session_active = True
-            self.session_start_time = time.time()
+            self.session_start_monotonic = time.monotonic()  # Immune to wall-clock jumps
+            
+            # Render the QR code in a worker so neither the Tk thread nor this loop stalls on it
+            try:
+                qr_image = await asyncio.get_running_loop().run_in_executor(
+                    None, _render_qr, teacher_ip, session_code, password)
+            except Exception as qr_error:
+                self.logger.error(f"Error rendering QR code: {qr_error}")
+                qr_image = None
             
             # Update UI on main thread
-            self.root.after(0, self._update_session_ui, session_code, password, teacher_ip, server_info)
+            self._post(self._update_session_ui, session_code, password, teacher_ip, server_info, qr_image)
             self.logger.info(f"Session started: {session_code}")
             
         except Exception as e:
             self.logger.error(f"Failed to start session: {e}")
-            self.root.after(0, lambda: show_error_message("Error", f"Failed to start session: {e}"))
+            self._post(show_error_message, "Error", f"Failed to start session: {e}")
     
-    def _update_session_ui(self, session_code: str, password: str, teacher_ip: str, server_info: dict = None):
+    def _update_session_ui(self, session_code: str, password: str, teacher_ip: str, server_info: dict = None,
+                           qr_image: Optional[Image.Image] = None):
         """Update UI with session information (must run on main thread)"""
         try:
+            self._session_details_cache = None
             self.session_code_var.set(session_code)
             self.session_password_var.set(password)
             
@@ -865,10 +1042,10 @@ Alternatively, scan the QR code from the teacher dashboard."""
             else:
                 self.password_display_var.set(password)
             
-            self.teacher_ip_var.set(teacher_ip)
+            self.set_teacher_ip(teacher_ip)
             
-            # Generate QR code on main thread with proper error handling
-            self.root.after(200, lambda: self._safe_generate_qr_code(teacher_ip, session_code, password))
+            # Install the QR code once the rest of the session UI is drawn
+            self.root.after_idle(self._safe_generate_qr_code, teacher_ip, session_code, password, qr_image)
             
             # Update buttons
             self.start_btn.configure(state=tk.DISABLED, text="✅ Session Active")
@@ -878,14 +1055,15 @@ Alternatively, scan the QR code from the teacher dashboard."""
             
             # Update status
             self.status_var.set(f"Session Active: {session_code}")
-            self.header_status_var.set("Session started successfully")
-            self.network_status_var.set("Network: Connected")
+            self._update_session_stats()
+            self._restart_periodic_updates()
+            self.set_network_status("Network: Connected")
             
             # Get server info and update ports status
             if server_info:
                 ws_port = server_info.get('websocket_port', 8765)
                 http_port = server_info.get('http_port', 8080)
-                self.ports_status_var.set(f"Ports: WS:{ws_port}, HTTP:{http_port}")
+                self.set_ports_status(f"Ports: WS:{ws_port}, HTTP:{http_port}")
             
             # Add success log
             self._add_activity_log(f"Session {session_code} started successfully on {teacher_ip}", "success")
@@ -894,7 +1072,8 @@ Alternatively, scan the QR code from the teacher dashboard."""
             self.logger.error(f"Error updating session UI: {e}")
             show_error_message("UI Error", f"Failed to update interface: {e}")
     
-    def _safe_generate_qr_code(self, teacher_ip: str, session_code: str, password: str):
+    def _safe_generate_qr_code(self, teacher_ip: str, session_code: str, password: str,
+                               qr_image: Optional[Image.Image] = None):
         """Safely generate QR code with better error handling"""
         try:
             # Check if QR label still exists and is valid
@@ -909,20 +1088,21 @@ Alternatively, scan the QR code from the teacher dashboard."""
                 self.logger.warning("QR label widget no longer exists")
                 return
             
-            # Generate QR code
+            # Generate QR code, unless it was already rendered off the Tk thread
             try:
-                qr_data = {
-                    "type": "focusclass_session", 
-                    "teacher_ip": teacher_ip, 
-                    "session_code": session_code, 
-                    "password": password
-                }
-                
-                qr_image = create_qr_code(qr_data, size=150)
+                if qr_image is None:
+                    qr_image = _render_qr(teacher_ip, session_code, password)
+                if qr_image.size != (QR_CODE_SIZE, QR_CODE_SIZE):
+                    qr_image = qr_image.resize((QR_CODE_SIZE, QR_CODE_SIZE))
                 
-                # Create PhotoImage in a try-catch
+                # Paste into the shared PhotoImage, creating it on first use
                 try:
-                    qr_photo = ImageTk.PhotoImage(qr_image)
+                    qr_photo = self._qr_photo
+                    if qr_photo is None:
+                        from PIL import ImageTk  # Deferred until a session is started
+                        qr_photo = self._qr_photo = ImageTk.PhotoImage(qr_image)
+                    else:
+                        qr_photo.paste(qr_image)
                     self.qr_label.configure(image=qr_photo, text="")
                     self.qr_label.image = qr_photo  # Keep reference
                     self.logger.info("QR code generated successfully")
@@ -942,41 +1122,6 @@ Alternatively, scan the QR code from the teacher dashboard."""
             except:
                 pass  # Complete failure, give up
     
-    def _generate_qr_code(self, teacher_ip: str, session_code: str, password: str):
-        """Generate QR code safely on main thread"""
-        try:
-            # Ensure we're on the main thread and QR label exists
-            if not hasattr(self, 'qr_label') or not self.qr_label.winfo_exists():
-                self.logger.warning("QR label not ready, skipping QR generation")
-                return
-            
-            # Create QR code data
-            qr_data = {
-                "type": "focusclass_session", 
-                "teacher_ip": teacher_ip, 
-                "session_code": session_code, 
-                "password": password
-            }
-            
-            # Generate QR code image
-            qr_image = create_qr_code(qr_data, size=150)
-            
-            # Convert to PhotoImage on main thread
-            qr_photo = ImageTk.PhotoImage(qr_image)
-            
-            # Update label safely
-            try:
-                self.qr_label.configure(image=qr_photo, text="")
-                self.qr_label.image = qr_photo  # Keep reference to prevent garbage collection
-                self.logger.info("QR code generated successfully")
-            except (tk.TclError, AttributeError) as e:
-                self.logger.error(f"Tkinter error updating QR label: {e}")
-                self._set_qr_fallback_text(session_code, teacher_ip, password)
-            
-        except Exception as e:
-            self.logger.error(f"Failed to generate QR code: {e}")
-            self._set_qr_fallback_text(session_code, teacher_ip, password)
-    
     def _set_qr_fallback_text(self, session_code: str, teacher_ip: str, password: str):
         """Set fallback text when QR code generation fails"""
         try:
@@ -991,28 +1136,19 @@ Alternatively, scan the QR code from the teacher dashboard."""
     def end_session(self):
         """End current session"""
         if ask_yes_no("Confirm", "End the session?"):
-            def run_async_task():
-                try:
-                    # Create new event loop for this thread
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(self._end_session_async())
-                except Exception as e:
-                    self.logger.error(f"Error ending session: {e}")
-                finally:
-                    loop.close()
-            
-            threading.Thread(target=run_async_task, daemon=True).start()
+            self._submit(self._end_session_async())
     
     async def _end_session_async(self):
         """Async session end"""
         try:
-            # Save session data first
+            # Save session data while the network server shuts down
+            if self._violation_flush_task is not None:
+                await self._violation_flush_task
+            await self._flush_violation_rows()
+            operations = [self.network_manager.stop_server()]
             if self.session_id:
-                await self.db_manager.end_session(self.session_id)
-            
-            # Stop network server with proper cleanup
-            await self.network_manager.stop_server()
+                operations.append(self.db_manager.end_session(self.session_id))
+            await asyncio.gather(*operations)
             
             # Stop screen sharing
             if self.screen_sharing_active:
@@ -1024,19 +1160,20 @@ Alternatively, scan the QR code from the teacher dashboard."""
             self.focus_mode_active = False
             
             # Update UI on main thread
-            self.root.after(0, self._reset_session_ui)
-            self.root.after(0, lambda: self._add_activity_log("Session ended successfully", "info"))
+            self._post(self._reset_session_ui)
+            self._post(self._add_activity_log, "Session ended successfully", "info")
             
             self.logger.info("Session ended successfully")
             
         except Exception as e:
             self.logger.error(f"Error ending session: {e}")
             # Show error but still reset UI
-            self.root.after(0, lambda: show_error_message("Warning", f"Session ended with errors: {e}"))
-            self.root.after(0, self._reset_session_ui)
+            self._post(show_error_message, "Warning", f"Session ended with errors: {e}")
+            self._post(self._reset_session_ui)
     
     def _reset_session_ui(self):
         """Reset UI to initial state"""
+        self._session_details_cache = None
         self.session_code_var.set("Not Started")
         self.session_password_var.set("")
         self.password_display_var.set("")
@@ -1052,20 +1189,24 @@ Alternatively, scan the QR code from the teacher dashboard."""
         self.focus_btn.configure(state=tk.DISABLED, text="🔒 Enable Focus Mode")
         self.end_btn.configure(state=tk.DISABLED)
         
-        # Clear students tree
-        for item in self.students_tree.get_children():
-            self.students_tree.delete(item)
+        # Clear students tree in one call
+        children = self.students_tree.get_children()
+        if children:
+            self.students_tree.delete(*children)
+        self._tree_rows = {}
         
         # Clear activity log
-        self.activities_text.delete(1.0, tk.END)
+        self._reset_activity_log()
         
         # Reset status
         self.status_var.set("Ready - Start a session to begin")
         self.header_status_var.set("Ready to start session")
-        self.network_status_var.set("Network: Ready")
-        self.ports_status_var.set("Ports: Not started")
+        self.set_network_status("Network: Ready")
+        self.set_ports_status("Ports: Not started")
         
         # Reset counters
+        self._elapsed_seconds = 0
+        self._last_ui_state = dict.fromkeys(self._last_ui_state)
         self.duration_var.set("00:00:00")
         self.duration_header_var.set("00:00:00")
         self.students_count_var.set("0")
@@ -1073,7 +1214,6 @@ Alternatively, scan the QR code from the teacher dashboard."""
         self.violations_count_var.set("0")
         self.violations_header_var.set("0")
         self.students_count_display_var.set("Students Connected: 0")
-        self.total_activities_var.set("Total Activities: 0")
     
     def start_screen_sharing(self):
         """Start screen sharing"""
@@ -1105,58 +1245,39 @@ Alternatively, scan the QR code from the teacher dashboard."""
     
     def enable_focus_mode(self):
         """Enable focus mode"""
-        def run_async_task():
-            try:
-                # Create new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._enable_focus_mode_async())
-            except Exception as e:
-                self.logger.error(f"Error enabling focus mode: {e}")
-            finally:
-                loop.close()
-        
-        threading.Thread(target=run_async_task, daemon=True).start()
+        self._submit(self._enable_focus_mode_async())
     
     async def _enable_focus_mode_async(self):
         """Async focus mode enable"""
         try:
-            await self.network_manager.broadcast_message("enable_focus_mode", {"enabled": True})
+            # The broadcast and the database update are independent; run them together
+            operations = [self.network_manager.broadcast_message("enable_focus_mode", {"enabled": True})]
             if self.session_id:
-                await self.db_manager.update_focus_mode(self.session_id, True)
+                operations.append(self.db_manager.update_focus_mode(self.session_id, True))
+            await asyncio.gather(*operations)
             
             self.focus_mode_active = True
-            self.root.after(0, lambda: self.focus_btn.configure(text="🔓 Disable Focus Mode", command=self.disable_focus_mode, bg=TKINTER_THEME["error_color"]))
-            self.root.after(0, lambda: self.status_var.set("Focus mode enabled"))
+            self._post(lambda: self.focus_btn.configure(text="🔓 Disable Focus Mode", command=self.disable_focus_mode, bg=TKINTER_THEME["error_color"]))
+            self._post(self.status_var.set, "Focus mode enabled")
             
         except Exception as e:
             self.logger.error(f"Error enabling focus mode: {e}")
     
     def disable_focus_mode(self):
         """Disable focus mode"""
-        def run_async_task():
-            try:
-                # Create new event loop for this thread
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._disable_focus_mode_async())
-            except Exception as e:
-                self.logger.error(f"Error disabling focus mode: {e}")
-            finally:
-                loop.close()
-        
-        threading.Thread(target=run_async_task, daemon=True).start()
+        self._submit(self._disable_focus_mode_async())
     
     async def _disable_focus_mode_async(self):
         """Async focus mode disable"""
         try:
-            await self.network_manager.broadcast_message("disable_focus_mode", {"enabled": False})
+            operations = [self.network_manager.broadcast_message("disable_focus_mode", {"enabled": False})]
             if self.session_id:
-                await self.db_manager.update_focus_mode(self.session_id, False)
+                operations.append(self.db_manager.update_focus_mode(self.session_id, False))
+            await asyncio.gather(*operations)
             
             self.focus_mode_active = False
-            self.root.after(0, lambda: self.focus_btn.configure(text="🔒 Enable Focus Mode", command=self.enable_focus_mode, bg=TKINTER_THEME["warning_color"]))
-            self.root.after(0, lambda: self.status_var.set("Focus mode disabled"))
+            self._post(lambda: self.focus_btn.configure(text="🔒 Enable Focus Mode", command=self.enable_focus_mode, bg=TKINTER_THEME["warning_color"]))
+            self._post(self.status_var.set, "Focus mode disabled")
             
         except Exception as e:
             self.logger.error(f"Error disabling focus mode: {e}")
@@ -1169,16 +1290,11 @@ Alternatively, scan the QR code from the teacher dashboard."""
             
             if self.session_id:
                 student_id = await self.db_manager.add_student(self.session_id, student_name, student_ip)
-                self.connected_students[client_id] = {
-                    "student_id": student_id, 
-                    "name": student_name, 
-                    "ip": student_ip,
-                    "violations": 0,
-                    "connected_at": time.time()
-                }
+                self._add_student(client_id, student_id, student_name, student_ip,
+                                  data.get("capabilities", {}).get("supported_codecs", ["jpeg"]))
             
-            self.root.after(0, self._update_students_tree)
-            self.root.after(0, lambda: self._add_activity_log(f"Student {student_name} ({student_ip}) connected", "success"))
+            self._post(self._request_ui_refresh, True)
+            self._post(self._add_activity_log, f"Student {student_name} ({student_ip}) connected", "success")
             
         except Exception as e:
             self.logger.error(f"Error handling authentication: {e}")
@@ -1186,122 +1302,293 @@ Alternatively, scan the QR code from the teacher dashboard."""
     async def handle_student_disconnection(self, client_id: str):
         """Handle student disconnection"""
         try:
-            if client_id in self.connected_students:
-                student_info = self.connected_students[client_id]
-                await self.db_manager.remove_student(student_info["student_id"])
+            idx = self._client_index.get(client_id)
+            if idx is not None:
+                student_name = self._student_names[idx]
+                await self.db_manager.remove_student(self._student_db_ids[idx])
+                
+                self._post(self._add_activity_log, f"Student {student_name} disconnected", "warning")
+                self._remove_student(client_id)
                 
-                self.root.after(0, lambda: self._add_activity_log(f"Student {student_info['name']} disconnected", "warning"))
-                del self.connected_students[client_id]
-                self.root.after(0, self._update_students_tree)
+                # Forget the student's open throttle windows
+                throttle = self.violation_throttle
+                for key in [key for key in throttle if key[0] == client_id]:
+                    del throttle[key]
+                self._post(self._request_ui_refresh, True)
                 
         except Exception as e:
             self.logger.error(f"Error handling disconnection: {e}")
     
-    async def handle_violation(self, client_id: str, data: dict):
+    async def handle_violation(self, client_id: str, violation: Violation):
         """Handle focus violation with throttling"""
         try:
-            if client_id not in self.connected_students:
+            idx = self._client_index.get(client_id)
+            if idx is None:
                 return
             
-            student_name = self.connected_students[client_id]["name"]
-            violation_type = data.get("type", "unknown")
-            description = data.get("description", "")
+            student_name = self._student_names[idx]
+            violation_type = violation.type
+            description = violation.description
             
-            # Simple throttling
-            current_time = time.time()
-            throttle_key = f"{client_id}_{violation_type}"
+            # Simple throttling; expired windows are dropped from the front
+            now = time.monotonic()
+            throttle = self.violation_throttle
+            while throttle:
+                if now - next(iter(throttle.values())).start < self.violation_cooldown:
+                    break
+                throttle.popitem(last=False)
             
-            if throttle_key in self.violation_throttle:
-                last_time, count = self.violation_throttle[throttle_key]
-                if current_time - last_time < self.violation_cooldown:
-                    if count >= 3:
-                        return  # Silent increment
-                    else:
-                        self.violation_throttle[throttle_key] = (last_time, count + 1)
-                else:
-                    self.violation_throttle[throttle_key] = (current_time, 1)
+            throttle_key = (client_id, violation_type)
+            window = throttle.get(throttle_key)
+            if window is None:
+                window = throttle[throttle_key] = _ThrottleWindow(now)
             else:
-                self.violation_throttle[throttle_key] = (current_time, 1)
+                if window.count >= self.VIOLATION_THROTTLE_LIMIT:
+                    return  # Silent increment
+                window.count += 1
+            count = window.count
             
-            # Log violation
+            # Log violation with the next batched database write
             if self.session_id:
-                await self.db_manager.log_violation(self.session_id, self.connected_students[client_id]["student_id"], violation_type, description)
+                self._queue_violation_row(self._student_db_ids[idx], violation_type, description)
             
             # Update student violation count
-            if client_id in self.connected_students:
-                self.connected_students[client_id]['violations'] = self.connected_students[client_id].get('violations', 0) + 1
+            with self._roster_lock:
+                self._student_violations[idx] += 1
+                self._total_violations += 1
             
             # Update UI
-            count = self.violation_throttle[throttle_key][1]
-            display_desc = description
-            if count > 1:
-                display_desc += f" (x{count})"
-            
-            self.root.after(0, lambda: self._add_activity_log(f"Violation from {student_name}: {violation_type} - {display_desc}", "violation"))
-            self.root.after(0, self._update_students_tree)
+            suffix = self.VIOLATION_REPEAT_SUFFIX[count]
+            self._post(self._add_activity_log, f"Violation from {student_name}: {violation_type} - {description}{suffix}", "violation")
+            self._post(self._refresh_student_row, client_id)
+            self._post(self._request_ui_refresh)
             
         except Exception as e:
             self.logger.error(f"Error handling violation: {e}")
     
-    def _update_students_tree(self):
-        """Update students tree view"""
-        # Clear existing items
-        for item in self.students_tree.get_children():
-            self.students_tree.delete(item)
-        
-        # Add current students
-        for client_id, student_info in self.connected_students.items():
-            name = student_info.get('name', 'Unknown')
-            ip = student_info.get('ip', 'Unknown')
-            violations = student_info.get('violations', 0)
-            status = "Connected" if client_id in self.connected_students else "Disconnected"
+    def _queue_violation_row(self, student_id: int, violation_type: str, description: str):
+        """Queue a violation for the database, scheduling a flush (runs on the async loop)"""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())  # Matches CURRENT_TIMESTAMP
+        self._violation_rows.append((self.session_id, student_id, violation_type, description, timestamp))
+        
+        if self._violation_flush_handle is None:
+            self._violation_flush_handle = asyncio.get_running_loop().call_later(
+                VIOLATION_DB_FLUSH_INTERVAL, self._start_violation_flush
+            )
+    
+    def _start_violation_flush(self):
+        """Run the timed violation flush as a task that stays referenced until it finishes"""
+        self._violation_flush_handle = None
+        self._violation_flush_task = asyncio.get_running_loop().create_task(self._flush_violation_rows())
+        self._violation_flush_task.add_done_callback(self._on_violation_flush_done)
+    
+    def _on_violation_flush_done(self, task: asyncio.Task):
+        """Forget the finished flush task"""
+        if self._violation_flush_task is task:
+            self._violation_flush_task = None
+    
+    async def _flush_violation_rows(self):
+        """Write queued violations in one database transaction"""
+        if self._violation_flush_handle is not None:
+            self._violation_flush_handle.cancel()
+            self._violation_flush_handle = None
+        rows, self._violation_rows = self._violation_rows, []
+        if not rows:
+            return
+        
+        try:
+            await self.db_manager.log_violations_batch(rows)
+        except Exception as e:
+            self.logger.error(f"Error logging violations: {e}")
+    
+    async def handle_violations_batch(self, client_id: str, violations: List[Violation]):
+        """Handle a batch of focus violations sent in one message"""
+        for violation in violations:
+            await self.handle_violation(client_id, violation)
+    
+    def _add_student(self, client_id: str, student_id: int, name: str, ip: str, codecs: List[str]):
+        """Append a connected student to the roster columns"""
+        if client_id in self._client_index:
+            self._remove_student(client_id)
+        
+        with self._roster_lock:
+            self._client_index[client_id] = len(self._client_ids)
+            self._client_ids.append(client_id)
+            self._student_names.append(name)
+            self._student_ips.append(ip)
+            self._student_db_ids.append(student_id)
+            self._student_violations.append(0)
+            self._student_connected_at.append(time.monotonic())
+            self._student_codecs.append(codecs)
+    
+    def _remove_student(self, client_id: str):
+        """Remove a student from the roster columns, keeping the order of the rest"""
+        with self._roster_lock:
+            idx = self._client_index.pop(client_id, None)
+            if idx is None:
+                return
             
-            self.students_tree.insert('', tk.END, values=(name, ip, status, violations))
+            self._total_violations -= self._student_violations[idx]
+            for column in self._student_columns:
+                del column[idx]
+            for i in range(idx, len(self._client_ids)):
+                self._client_index[self._client_ids[i]] = i
+    
+    def _roster_name(self, client_id: str) -> Optional[str]:
+        """Name of a connected student, or None if they have left (Tk thread)"""
+        with self._roster_lock:
+            idx = self._client_index.get(client_id)
+            return None if idx is None else self._student_names[idx]
+    
+    def _update_students_tree(self):
+        """Update students tree view, touching only rows that changed"""
+        if not hasattr(self, 'students_tree'):
+            return
+        
+        # Row tuples are assembled by zip in C rather than unpacked and repacked per student
+        with self._roster_lock:
+            values = zip(self._student_names, self._student_ips, repeat(self.STATUS_CONNECTED), self._student_violations)
+            rows = dict(zip(self._client_ids, values))
+        
+        tree = self.students_tree
+        shown_rows = self._tree_rows
+        
+        # Remove students that have left
+        removed = [client_id for client_id in shown_rows if client_id not in rows]
+        if removed:
+            tree.delete(*removed)
+        
+        # Add new students and update changed rows
+        insert, item, end = tree.insert, tree.item, tk.END
+        for client_id, values in rows.items():
+            shown = shown_rows.get(client_id)
+            if shown is None:
+                insert('', end, iid=client_id, values=values)
+            elif shown != values:
+                item(client_id, values=values)
+        
+        self._tree_rows = rows
+    
+    def _request_ui_refresh(self, tree_changed: bool = False):
+        """Schedule one stats refresh, plus a tree diff if rows were added or removed"""
+        if tree_changed:
+            self._tree_dirty = True
+        if not self._ui_refresh_scheduled:
+            self._ui_refresh_scheduled = True
+            self.root.after(self.UI_REFRESH_DELAY, self._flush_ui_refresh)
+    
+    def _flush_ui_refresh(self):
+        """Apply the refreshes requested since the last flush"""
+        self._ui_refresh_scheduled = False
+        if not self._window_visible:
+            return  # _on_root_map requests the refresh again; _tree_dirty is kept until then
+        if self._tree_dirty:
+            self._tree_dirty = False
+            self._update_students_tree()
+        self._update_session_stats()
+    
+    def _refresh_student_row(self, client_id: str):
+        """Update one student's tree row in place if its values changed"""
+        shown = self._tree_rows.get(client_id)
+        if shown is None:
+            return  # Row is added by the next full tree update
+        
+        with self._roster_lock:
+            idx = self._client_index.get(client_id)
+            if idx is None:
+                return  # Row is removed by the next full tree update
+            values = (self._student_names[idx], self._student_ips[idx], self.STATUS_CONNECTED, self._student_violations[idx])
+        if values != shown:
+            self.students_tree.item(client_id, values=values)
+            self._tree_rows[client_id] = values
     
     def _add_activity_log(self, message: str, log_type: str = "info"):
         """Add activity log message with color coding"""
-        timestamp = time.strftime("%H:%M:%S")
-        
         # Determine emoji and color based on log type
-        emoji_map = {
-            "info": "ℹ️",
-            "success": "✅",
-            "warning": "⚠️",
-            "error": "❌",
-            "violation": "😱"
-        }
-        
-        emoji = emoji_map.get(log_type, "ℹ️")
-        full_message = f"[{timestamp}] {emoji} {message}\n"
-        
-        # Insert with color tag
-        self.activities_text.insert(tk.END, full_message, log_type)
-        
-        # Auto-scroll if enabled
-        if self.auto_scroll_var.get():
-            self.activities_text.see(tk.END)
+        emoji = self.ACTIVITY_LOG_EMOJI.get(log_type, "ℹ️")
+        self._pending_log_lines.append(("%s%s %s\n" % (self._ts_prefix(), emoji, message), log_type))
+        
+        # Coalesce bursts of log lines into a single redraw
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.root.after_idle(self._flush_activity_log)
+    
+    def _flush_activity_log(self):
+        """Write pending activity log lines with one insert, scroll and trim"""
+        self._log_flush_scheduled = False
+        if not self._pending_log_lines:
+            return
+        
+        pending, self._pending_log_lines = self._pending_log_lines, []
+        self._log_lines.extend(pending)
+        
+        # While hidden only the retained log grows; _on_root_map redraws it in one go
+        if not self._window_visible:
+            self._log_stale = True
+            return
+        
+        # Only lines passing the active filter reach the widget
+        tags = self._log_filter_tags
+        if tags is not None:
+            pending = [line for line in pending if line[1] in tags]
         
-        # Update activity count
-        current_text = self.activities_text.get(1.0, tk.END)
-        line_count = len(current_text.splitlines()) - 1  # -1 for empty line at end
-        self.total_activities_var.set(f"Total Activities: {line_count}")
+        # A burst bigger than the log would be trimmed straight away; skip those lines
+        if len(pending) > TEACHER_ACTIVITY_LOG_MAX_LINES:
+            pending = pending[-TEACHER_ACTIVITY_LOG_MAX_LINES:]
         
-        # Keep only last 200 lines to prevent memory issues
-        lines = current_text.splitlines()
-        if len(lines) > 200:
-            # Delete old lines
-            self.activities_text.delete(1.0, f"{len(lines) - 200}.0")
+        # Text.insert accepts alternating text/tag arguments; same-tag runs go in as one string
+        if pending:
+            txt, end = self.activities_text, tk.END
+            self._log_widget_lines += len(pending)
+            txt.insert(end, *_tag_runs(pending))
+            
+            # Auto-scroll if enabled
+            if self._auto_scroll:
+                txt.see(end)
+        
+        # Trim overflow from the widget in one pass rather than on every flush
+        if self._log_widget_lines > TEACHER_ACTIVITY_LOG_MAX_LINES and not self._log_trim_scheduled:
+            self._log_trim_scheduled = True
+            self.root.after(TEACHER_ACTIVITY_LOG_TRIM_INTERVAL, self._trim_activity_log)
+        
+        self._update_activity_count()
+    
+    def _update_activity_count(self):
+        """Show the number of retained activity log lines"""
+        activity_count = len(self._log_lines)
+        if self._set_if_changed("activities", activity_count):
+            self.total_activities_var.set(f"Total Activities: {activity_count}")
+    
+    def _trim_activity_log(self):
+        """Drop lines beyond TEACHER_ACTIVITY_LOG_MAX_LINES from the top of the activity log"""
+        self._log_trim_scheduled = False
+        excess = self._log_widget_lines - TEACHER_ACTIVITY_LOG_MAX_LINES
+        if excess <= 0:
+            return
+        
+        try:
+            self.activities_text.delete("1.0", f"{excess + 1}.0")
+            self._log_widget_lines = TEACHER_ACTIVITY_LOG_MAX_LINES
+        except tk.TclError as e:
+            self.logger.error(f"Error trimming activity log: {e}")
     
     def clear_activity_log(self):
         """Clear the activity log"""
         try:
-            self.activities_text.config(state=tk.NORMAL)
-            self.activities_text.delete(1.0, tk.END)
-            self.activities_text.config(state=tk.DISABLED)
+            self._pending_log_lines = []
+            self._reset_activity_log()
             self.logger.info("Activity log cleared")
         except Exception as e:
             self.logger.error(f"Error clearing activity log: {e}")
     
+    def _reset_activity_log(self):
+        """Empty the retained log, its counters and the widget together"""
+        self._log_lines.clear()
+        self._log_widget_lines = 0
+        self._last_ui_state["activities"] = 0
+        self.total_activities_var.set("Total Activities: 0")
+        self.activities_text.delete(1.0, tk.END)
+    
     def export_session_data(self):
         """Export session data"""
         if not self.session_active:
@@ -1317,26 +1604,54 @@ Alternatively, scan the QR code from the teacher dashboard."""
             )
             
             if filename:
-                # Export session data
-                export_data = f"""FocusClass Session Export
-=========================
-Session Code: {self.session_code_var.get()}
-Duration: {self.duration_var.get()}
-Students: {self.students_count_var.get()}
-Violations: {self.violations_count_var.get()}
-
-Activity Log:
-{self.activities_text.get(1.0, tk.END)}"""
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(export_data)
+                # Snapshot the session on the Tk thread; formatting and writing happen on the I/O pool
+                with self._roster_lock:
+                    student_count = len(self._client_ids)
+                    total_violations = self._total_violations
+                snapshot = (
+                    self.session_code_var.get(),
+                    int(time.monotonic() - self.session_start_monotonic),
+                    student_count,
+                    total_violations,
+                    list(self._log_lines)
+                )
                 
-                show_info_message("Export Complete", f"Session data exported to {filename}")
+                # Write on the I/O pool and report back on the Tk thread
+                future = self._io_pool.submit(self._write_export, filename, snapshot)
+                future.add_done_callback(lambda f: self._post(self._on_export_done, filename, f))
                 
         except Exception as e:
             self.logger.error(f"Export error: {e}")
             show_error_message("Export Error", f"Failed to export data: {e}")
     
+    @staticmethod
+    def _write_export(filename: str, snapshot: tuple):
+        """Format a session snapshot and write it to disk (runs on the I/O pool)"""
+        session_code, elapsed, student_count, total_violations, log_entries = snapshot
+        hours, rest = divmod(elapsed, 3600)
+        minutes, seconds = divmod(rest, 60)
+        header = f"""FocusClass Session Export
+=========================
+Session Code: {session_code}
+Duration: {hours:02d}:{minutes:02d}:{seconds:02d}
+Students: {student_count}
+Violations: {total_violations}
+
+Activity Log:
+"""
+        with open(filename, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            f.write(header)
+            f.writelines([text for text, _ in log_entries])
+    
+    def _on_export_done(self, filename: str, future):
+        """Report the result of a session export"""
+        error = future.exception()
+        if error:
+            self.logger.error(f"Export error: {error}")
+            show_error_message("Export Error", f"Failed to export data: {error}")
+        else:
+            show_info_message("Export Complete", f"Session data exported to {filename}")
+    
     def run(self):
         """Run the teacher application"""
         try:
@@ -1346,7 +1661,8 @@ Activity Log:
         except Exception as e:
             self.logger.error(f"Error in teacher app main loop: {e}")
         finally:
-            # Clean shutdown
+            # Clean shutdown; the Tk loop is gone, so cleanup must not queue UI work
+            self.async_helper.close_ui()
             self.cleanup()
     
     def on_closing(self):
@@ -1354,18 +1670,12 @@ Activity Log:
         try:
             if self.session_active:
                 if ask_yes_no("Confirm", "End the session and close the application?"):
-                    # End session first
-                    def run_async_task():
-                        try:
-                            loop = asyncio.new_event_loop()
-                            asyncio.set_event_loop(loop)
-                            loop.run_until_complete(self._end_session_async())
-                        finally:
-                            loop.close()
-                            # Close the window
-                            self.root.destroy()
-                    
-                    threading.Thread(target=run_async_task, daemon=True).start()
+                    # End session on the shared loop, then close the window on the Tk thread
+                    future = self._submit(self._end_session_async())
+                    if future is None:
+                        self.root.destroy()
+                    else:
+                        future.add_done_callback(lambda f: self._post(self.root.destroy))
                 else:
                     return  # Don't close
             else:
@@ -1377,12 +1687,14 @@ Activity Log:
     def cleanup(self):
         """Clean up resources"""
         try:
-            # Cancel all pending async tasks
-            if hasattr(self, 'async_tasks'):
-                for task in self.async_tasks.copy():
-                    if not task.done():
-                        task.cancel()
-                self.async_tasks.clear()
+            # Cancel the background flush tasks on the loop that owns them
+            if hasattr(self, 'async_helper'):
+                future = self.async_helper.run_async(self._cancel_async_tasks())
+                if future is not None:
+                    try:
+                        future.result(timeout=self.TASK_CANCEL_TIMEOUT + 0.5)
+                    except Exception:
+                        pass  # Shutdown continues regardless
             
             # Stop screen sharing
             if hasattr(self, 'session_active') and self.session_active:
@@ -1393,20 +1705,31 @@ Activity Log:
             # Clean up async helper
             if hasattr(self, 'async_helper'):
                 try:
-                    self.async_helper.stop_async_loop()
+                    self.async_helper.stop()
                 except:
                     pass  # Ignore cleanup errors
             
+            # Let any in-flight export finish writing
+            if hasattr(self, '_io_pool'):
+                self._io_pool.shutdown(wait=True)
+            
             self.logger.info("Teacher application cleanup completed")
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
     
-    def _track_async_task(self, coro):
-        """Create and track an async task"""
-        task = asyncio.create_task(coro)
-        self.async_tasks.add(task)
-        task.add_done_callback(self.async_tasks.discard)
-        return task
+    async def _cancel_async_tasks(self):
+        """Cancel the violation and outbound message flushes and wait for them to stop (runs on the async loop)"""
+        if self._violation_flush_handle is not None:
+            self._violation_flush_handle.cancel()
+            self._violation_flush_handle = None
+        
+        pending = self.network_manager.cancel_outbound_flush()
+        task = self._violation_flush_task
+        if task is not None and not task.done():
+            task.cancel()
+            pending.append(task)
+        if pending:
+            await asyncio.wait(pending, timeout=self.TASK_CANCEL_TIMEOUT)
 
 
 def main():
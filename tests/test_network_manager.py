@@ -0,0 +1,42 @@
+"""
+Tests for the NetworkManager HTTP API handlers
+"""
+
+import json
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from common.network_manager import NetworkManager
+
+
+class SessionInfoHandlerTest(unittest.IsolatedAsyncioTestCase):
+    """Responses built by _handle_session_info"""
+    
+    def setUp(self):
+        self.manager = NetworkManager(is_teacher=True)
+        self.manager.session_code = "ABCD1234"
+    
+    async def test_known_session_returns_info(self):
+        request = SimpleNamespace(match_info={"session_code": "ABCD1234"})
+        response = await self.manager._handle_session_info(request)
+        
+        self.assertEqual(response.status, 200)
+        body = json.loads(response.text)
+        self.assertTrue(body["success"])
+        self.assertEqual(body["session_code"], "ABCD1234")
+        self.assertEqual(body["connected_students"], 0)
+    
+    async def test_unknown_session_returns_404(self):
+        request = SimpleNamespace(match_info={"session_code": "WRONG"})
+        response = await self.manager._handle_session_info(request)
+        
+        self.assertEqual(response.status, 404)
+        self.assertEqual(json.loads(response.text), {"success": False, "error": "Session not found"})
+
+
+if __name__ == "__main__":
+    unittest.main()